@@ -1,25 +1,59 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import httpx
+import aiofiles
+import numpy as np
+from async_lru import alru_cache
 import sys
 import os
+import orjson
 import asyncio
 from datetime import datetime
 import time
-import subprocess
-import tempfile
-import shutil
 import uuid
+import queue
+import signal
+import multiprocessing
 from pathlib import Path
 
-# Add the main directory to Python path to import existing RAG system
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'main'))
+# Project paths, resolved once at import
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Add the main directory to Python path to import existing RAG system, and the
+# project root for the ocr_system package (once, if this module is imported again)
+for _import_dir in (str(PROJECT_ROOT / "main"), str(PROJECT_ROOT)):
+    if _import_dir not in sys.path:
+        sys.path.append(_import_dir)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global ollama_client
+    # One pooled keep-alive client for all Ollama calls
+    ollama_client = app.state.httpx = httpx.AsyncClient(
+        base_url=OLLAMA_BASE_URL,
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+        timeout=120
+    )
+    # Initialize the RAG system once at startup instead of on every request
+    await initialize_rag_system()
+    yield
+    if chat_batcher is not None:
+        chat_batcher.stop()
+    if ocr_pool is not None:
+        ocr_pool.shutdown(wait=False, cancel_futures=True)
+    await ollama_client.aclose()
 
 app = FastAPI(
     title="RAG Chatbot API",
     description="API for administrative document Q&A chatbot",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for React frontend
@@ -33,7 +67,39 @@ app.add_middleware(
 
 # Global variables for RAG components
 rag_chain = None
-retriever = None
+retriever = None  # mock mode only; the real path queries the Chroma collection
+embeddings = None
+collection = None
+chat_batcher = None
+ollama_client = None
+ocr_pool = None
+rag_ready = False
+_init_lock = asyncio.Lock()
+
+# Ollama settings (same models as main/main.py and main/vector.py)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_MODEL = "llama3"
+# Must match the model used to build main/chroma_db (see main/vector.py)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "mxbai-embed-large")
+
+# Optional Text Embeddings Inference server (e.g. http://tei:8080) used instead of Ollama
+# for embeddings; it must serve the same base model (mixedbread-ai/mxbai-embed-large-v1)
+TEI_URL = os.getenv("TEI_URL")
+TEI_BATCH_SIZE = int(os.getenv("TEI_BATCH_SIZE", "32"))  # TEI's default --max-client-batch-size
+
+# Number of context documents retrieved per question (same as main/vector.py)
+RETRIEVER_K = 5
+
+# Upper bound on the context passed to the LLM (characters, roughly 4 per token)
+MAX_CONTEXT_CHARS = int(os.getenv("MAX_CONTEXT_CHARS", "8000"))
+
+# Answer caches: exact repeats (LRU) and near-duplicate questions (cosine similarity)
+CHAT_CACHE_SIZE = 1024
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+
+# Micro-batching of concurrent chat questions
+CHAT_MAX_BATCH = int(os.getenv("CHAT_MAX_BATCH", "8"))
+CHAT_MAX_WAIT_MS = float(os.getenv("CHAT_MAX_WAIT_MS", "20"))
 
 class ChatMessage(BaseModel):
     question: str
@@ -52,6 +118,19 @@ class HealthResponse(BaseModel):
 class SourcesResponse(BaseModel):
     sources: List[str]
 
+# Mock document sources, served as-is by /sources
+_MOCK_SOURCES_RESP = SourcesResponse(sources=[
+    "attestation_interets.txt",
+    "certificat_scolarite_arabe.txt",
+    "certificat_scolarite_Rayan.txt",
+    "cnops2.txt",
+    "decompte_remboursement.txt",
+    "demande_estivage.txt",
+    "remboursement_cnops1.txt",
+    "ticket_reservation.txt",
+    "tresorerie_generale_royaume.txt"
+])
+
 class UploadResponse(BaseModel):
     status: str
     message: str
@@ -63,111 +142,559 @@ class ProcessingStatus(BaseModel):
     message: str
     filename: str
 
-# Global variables for upload processing status
+# Project directories (PROJECT_ROOT is resolved once, at the top)
+DATASET_DIR = PROJECT_ROOT / "dataset"
+DATASET_DIR.mkdir(exist_ok=True)
+OCR_OUTPUT_DIR = PROJECT_ROOT / "ocr_results"
+
+# OCR runs in worker processes (CPU-bound)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_TIMEOUT = 300  # 5 minutes per file
+
+# Upload limits
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Upload processing status, shared across uvicorn workers through Redis.
+# processing_status is the in-process fallback when Redis is not reachable.
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost")
+STATUS_TTL = 3600  # seconds
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+REDIS_RETRY_AFTER = 30  # seconds before Redis is tried again after a failure
+
 processing_status = {}
+_redis = None
+_redis_retry_at = 0.0
+_redis_unavailable = False
+
+def _log_redis_unavailable(reason, retry_after=REDIS_RETRY_AFTER):
+    """Drop the Redis client after a failure so requests fall back to memory without waiting on it"""
+    global _redis, _redis_retry_at, _redis_unavailable
+    _redis = None
+    _redis_retry_at = time.monotonic() + retry_after
+    if not _redis_unavailable:
+        _redis_unavailable = True
+        print(f"Redis unavailable ({reason}), keeping upload status in process memory")
+
+async def _get_redis():
+    """Return the shared Redis client, or None if Redis cannot be used right now"""
+    global _redis, _redis_unavailable
+    if _redis is not None or time.monotonic() < _redis_retry_at:
+        return _redis
+    
+    if aioredis is None:
+        _log_redis_unavailable("redis package not installed", retry_after=float("inf"))
+        return None
+    
+    try:
+        client = aioredis.from_url(REDIS_URL)
+        await client.ping()
+        _redis = client
+        if _redis_unavailable:
+            _redis_unavailable = False
+            print("Redis reachable again, sharing upload status through it")
+    except Exception as e:
+        _log_redis_unavailable(e)
+    return _redis
+
+async def _set_status(file_id: str, status: dict):
+    client = await _get_redis()
+    if client is not None:
+        try:
+            await client.set(f"job:{file_id}", orjson.dumps(status), ex=STATUS_TTL)
+            # Written while Redis was down: the Redis copy is the current one now
+            processing_status.pop(file_id, None)
+            return
+        except Exception as e:
+            _log_redis_unavailable(e)
+    processing_status[file_id] = status
+
+# file_id -> in-flight status lookup, so concurrent polls of one job share a Redis round-trip
+_status_inflight = {}
+
+async def _get_status(file_id: str) -> Optional[dict]:
+    task = _status_inflight.get(file_id)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_fetch_status(file_id))
+        _status_inflight[file_id] = task
+        task.add_done_callback(lambda _: _status_inflight.pop(file_id, None))
+    # Shielded: one poller disconnecting must not cancel the lookup for the others
+    return await asyncio.shield(task)
+
+async def _fetch_status(file_id: str) -> Optional[dict]:
+    client = await _get_redis()
+    if client is not None:
+        try:
+            raw = await client.get(f"job:{file_id}")
+            if raw is not None:
+                return orjson.loads(raw)
+        except Exception as e:
+            _log_redis_unavailable(e)
+    return processing_status.get(file_id)
+
+async def _get_all_statuses() -> List[dict]:
+    # Keyed by file_id, so a job seen in memory and in Redis is listed once (the Redis copy)
+    statuses = dict(processing_status)
+    client = await _get_redis()
+    if client is not None:
+        try:
+            keys = [key async for key in client.scan_iter(match="job:*")]
+            if keys:
+                for key, raw in zip(keys, await client.mget(keys)):
+                    if raw is not None:
+                        statuses[key.decode().removeprefix("job:")] = orjson.loads(raw)
+        except Exception as e:
+            _log_redis_unavailable(e)
+    return list(statuses.values())
 
 # Mock classes for fallback when Ollama is not available
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+_NO_MATCH = 1 << 30
+
+# Keyword -> (retriever response ID, chain response ID). When several keywords
+# match, the lowest ID wins, which keeps the priority of the original if/elif rules.
+_MOCK_KEYWORDS = {
+    "compte": (0, 0),
+    "account": (0, 0),
+    "cnops": (1, _NO_MATCH),
+    "montant": (2, 2),
+    "remboursement": (2, _NO_MATCH),
+    "jours": (_NO_MATCH, 1),
+    "days": (_NO_MATCH, 1),
+    "amount": (_NO_MATCH, 2),
+    "رقم الحساب": (_NO_MATCH, 3),
+    "نبر الحساب": (_NO_MATCH, 3),
+}
+
+_MOCK_RETRIEVER_RESPONSES = (
+    ("Information sur le compte de crédit logement: Le numéro de compte associé au crédit logement est 01060150.",
+     "attestation_interets.txt"),
+    ("Traitement du dossier CNOPS 906377038 qui a pris 113 jours pour être traité.",
+     "cnops2.txt"),
+    ("Montant remboursé par l'AMO: 2,608.00 MAD, montant pris en charge par la Mutuelle: 192.00 MAD dans le décompte Sanlam.",
+     "decompte_remboursement.txt"),
+)
+
+_MOCK_CHAIN_RESPONSES = (
+    "Le numéro de compte associé au crédit logement est 01060150.",
+    "Le traitement du dossier CNOPS 906377038 a pris 113 jours.",
+    "Le montant remboursé par l'AMO dans le décompte Sanlam était de 2,608.00 MAD, et le montant pris en charge par la Mutuelle était de 192.00 MAD.",
+    "رقم الحساب المرتبط بقرض السكن هو 01060150.",
+)
+
+def _build_keyword_automaton():
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, response_ids in _MOCK_KEYWORDS.items():
+        automaton.add_word(keyword, response_ids)
+    automaton.make_automaton()
+    return automaton
+
+_MOCK_AUTOMATON = _build_keyword_automaton()
+
+@lru_cache(maxsize=1024)
+def _classify_question(question: str):
+    """Return the (retriever, chain) response IDs for a question in a single keyword scan"""
+    text = question.casefold()
+    if _MOCK_AUTOMATON is not None:
+        matches = (response_ids for _, response_ids in _MOCK_AUTOMATON.iter(text))
+    else:
+        matches = (response_ids for keyword, response_ids in _MOCK_KEYWORDS.items() if keyword in text)
+    
+    retriever_id = chain_id = _NO_MATCH
+    for r_id, c_id in matches:
+        retriever_id = min(retriever_id, r_id)
+        chain_id = min(chain_id, c_id)
+    return retriever_id, chain_id
+
 class MockDocument:
     def __init__(self, content: str, metadata: dict):
         self.page_content = content
         self.metadata = metadata
 
+# Mock retrieval results built once, keyed by retriever response ID (shared, do not mutate)
+_RESP_TABLE = {
+    response_id: [MockDocument(content, {"source": source})]
+    for response_id, (content, source) in enumerate(_MOCK_RETRIEVER_RESPONSES)
+}
+
 class MockRetriever:
     def invoke(self, question: str):
         # Mock document retrieval based on question keywords
-        question_lower = question.lower()
+        response_id, _ = _classify_question(question)
         
-        if "compte" in question_lower or "account" in question_lower:
-            return [MockDocument(
-                "Information sur le compte de crédit logement: Le numéro de compte associé au crédit logement est 01060150.",
-                {"source": "attestation_interets.txt"}
-            )]
-        elif "cnops" in question_lower:
-            return [MockDocument(
-                "Traitement du dossier CNOPS 906377038 qui a pris 113 jours pour être traité.",
-                {"source": "cnops2.txt"}
-            )]
-        elif "montant" in question_lower or "remboursement" in question_lower:
-            return [MockDocument(
-                "Montant remboursé par l'AMO: 2,608.00 MAD, montant pris en charge par la Mutuelle: 192.00 MAD dans le décompte Sanlam.",
-                {"source": "decompte_remboursement.txt"}
-            )]
-        else:
-            return [MockDocument(
-                f"Document simulé pour la question: {question}",
-                {"source": "mock_document.txt"}
-            )]
+        docs = _RESP_TABLE.get(response_id)
+        if docs is not None:
+            return docs
+        return [MockDocument(
+            f"Document simulé pour la question: {question}",
+            {"source": "mock_document.txt"}
+        )]
 
 class MockRAGChain:
     def invoke(self, inputs: dict):
         question = inputs.get("question", "")
         context = inputs.get("context", "")
         
-        # Simple rule-based responses
-        question_lower = question.lower()
+        # Simple rule-based responses (classification is shared with MockRetriever)
+        _, response_id = _classify_question(question)
         
-        if "compte" in question_lower or "account" in question_lower:
-            return "Le numéro de compte associé au crédit logement est 01060150."
-        elif "jours" in question_lower or "days" in question_lower:
-            return "Le traitement du dossier CNOPS 906377038 a pris 113 jours."
-        elif "montant" in question_lower or "amount" in question_lower:
-            return "Le montant remboursé par l'AMO dans le décompte Sanlam était de 2,608.00 MAD, et le montant pris en charge par la Mutuelle était de 192.00 MAD."
-        elif "رقم الحساب" in question or "نبر الحساب" in question:
-            return "رقم الحساب المرتبط بقرض السكن هو 01060150."
-        else:
-            return f"Je traite votre question sur les documents administratifs: '{question}'. Basé sur le contexte: {context[:100]}..."
+        if response_id < len(_MOCK_CHAIN_RESPONSES):
+            return _MOCK_CHAIN_RESPONSES[response_id]
+        return f"Je traite votre question sur les documents administratifs: '{question}'. Basé sur le contexte: {context[:100]}..."
+
+# RAG prompt (same template style as main/main.py)
+RAG_TEMPLATE = """
+    Tu es un assistant qui répond à la question {question} uniquement en te basant sur le contexte suivant 
+    sans mentionner la question, le nom des documents ou leurs ID: {context}
+    """
+
+class OllamaRAGChain:
+    """RAG prompt + generation calling Ollama's /api/generate on the shared pooled client"""
+
+    def __init__(self, client: httpx.AsyncClient, model: str = LLM_MODEL, template: str = RAG_TEMPLATE):
+        self.client = client
+        self.model = model
+        self.template = template
+
+    def _payload(self, inputs: dict, stream: bool) -> dict:
+        return {"model": self.model, "prompt": self.template.format(**inputs), "stream": stream}
+
+    async def ainvoke(self, inputs: dict) -> str:
+        response = await self.client.post("/api/generate", json=self._payload(inputs, False))
+        response.raise_for_status()
+        return orjson.loads(response.content)["response"]
+
+    async def abatch(self, inputs: List[dict], return_exceptions: bool = False):
+        # Ollama schedules concurrent requests itself (see OLLAMA_NUM_PARALLEL)
+        return await asyncio.gather(*(self.ainvoke(i) for i in inputs), return_exceptions=return_exceptions)
+
+    async def astream(self, inputs: dict):
+        async with self.client.stream("POST", "/api/generate", json=self._payload(inputs, True)) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+class OllamaHTTPEmbeddings:
+    """Embeddings from Ollama's /api/embed on the shared pooled client"""
+
+    def __init__(self, client: httpx.AsyncClient, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self._async_client = client
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        response = await self._async_client.post("/api/embed", json={"model": self.model, "input": texts})
+        response.raise_for_status()
+        return orjson.loads(response.content)["embeddings"]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+class TEIEmbeddings:
+    """Embeddings served by Hugging Face Text Embeddings Inference over pooled HTTP connections"""
+
+    def __init__(self, base_url: str, batch_size: int = TEI_BATCH_SIZE, timeout: float = 30):
+        self.batch_size = batch_size
+        limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        self._async_client = httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+    def _batches(self, texts: List[str]):
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        async def post(batch):
+            response = await self._async_client.post("/embed", json={"inputs": batch, "truncate": True})
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        
+        results = await asyncio.gather(*(post(batch) for batch in self._batches(texts)))
+        return [vector for batch in results for vector in batch]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+class SemanticCache:
+    """In-memory answer cache keyed by question embedding, for near-duplicate questions"""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_size: int = CHAT_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.clear()
+
+    def clear(self):
+        self._keys = []
+        self._vectors = []
+        self._results = []
+        self._exact = {}
+        self._matrix = None
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _bucket(vector) -> bytes:
+        # Vectors equal to 4 decimals share a bucket
+        return np.round(vector, 4).tobytes()
+
+    def get(self, vector):
+        """Return the cached result for a similar question, or None"""
+        if not self._results:
+            return None
+        
+        vector = self._normalize(vector)
+        result = self._exact.get(self._bucket(vector))
+        if result is not None:
+            return result
+        
+        # Flat inner-product search (cosine similarity on normalized vectors)
+        if self._matrix is None:
+            self._matrix = np.stack(self._vectors)
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        return self._results[best] if scores[best] >= self.threshold else None
+
+    def add(self, vector, result):
+        vector = self._normalize(vector)
+        if len(self._results) >= self.max_size:
+            self._exact.pop(self._keys.pop(0), None)
+            self._vectors.pop(0)
+            self._results.pop(0)
+        
+        key = self._bucket(vector)
+        self._keys.append(key)
+        self._vectors.append(vector)
+        self._results.append(result)
+        self._exact[key] = result
+        self._matrix = None
+
+semantic_cache = SemanticCache()
+
+class ChatBatcher:
+    """Coalesce chat questions arriving close together into batched embed + generate calls"""
+
+    def __init__(self, process_batch, max_batch: int = CHAT_MAX_BATCH, max_wait_ms: float = CHAT_MAX_WAIT_MS):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.task = None
+        self._inflight = set()
+
+    def start(self):
+        """Start the background consumer on the running event loop"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop the background consumer"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def submit(self, question: str):
+        """Queue a question and wait for its (answer, context_docs) result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((question, future))
+        return await future
+
+    async def _collect(self):
+        # Block until a first question arrives, then stretch the batch until it
+        # is full or the wait window closes; anything left over starts the next batch
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        if self.queue.empty() and not self._inflight:
+            # Idle server and a lone question: answer it now instead of waiting out the window
+            return batch
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Process the batch concurrently so the next one can be collected meanwhile
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            results = await self.process_batch([question for question, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+async def _ainvoke(runnable, inputs):
+    """Invoke a retriever/chain asynchronously, offloading sync-only objects to a thread"""
+    if hasattr(runnable, "ainvoke"):
+        return await runnable.ainvoke(inputs)
+    return await asyncio.to_thread(runnable.invoke, inputs)
+
+async def _astream(runnable, inputs):
+    """Stream a chain's output chunks, yielding the whole answer at once for sync-only objects"""
+    if hasattr(runnable, "astream"):
+        async for chunk in runnable.astream(inputs):
+            yield chunk
+    else:
+        yield await _ainvoke(runnable, inputs)
+
+def _build_context(docs) -> str:
+    # Prompt length drives generation time, so over-long contexts are cut to the budget
+    return "\n".join(doc.page_content for doc in docs)[:MAX_CONTEXT_CHARS]
 
-def initialize_rag_system():
-    """Initialize the RAG system components lazily"""
-    global rag_chain, retriever
+def _unique_sources(docs) -> List[str]:
+    # Unique sources, in retrieval order
+    return list(dict.fromkeys(doc.metadata.get("source", "unknown") for doc in docs))
+
+async def _retrieve_batch(questions: List[str], vectors=None):
+    """Retrieve context documents for a batch of questions with one embedding call and one Chroma query"""
+    if collection is None:
+        return await asyncio.gather(*(_ainvoke(retriever, q) for q in questions))
+    
+    from langchain_core.documents import Document
+    
+    if vectors is None:
+        vectors = await embeddings.aembed_documents(questions)
+    results = await asyncio.to_thread(
+        collection.query,
+        query_embeddings=vectors,
+        n_results=RETRIEVER_K,
+        include=["documents", "metadatas"]
+    )
+    return [
+        [Document(page_content=doc, metadata=metadata or {}) for doc, metadata in zip(docs, metadatas)]
+        for docs, metadatas in zip(results["documents"], results["metadatas"])
+    ]
+
+async def _answer_batch(questions: List[str]):
+    """Answer a batch of questions, returning (answer, sources) or an exception per question"""
+    results = [None] * len(questions)
+    
+    # Serve near-duplicates of already answered questions from the semantic cache
+    vectors = None
+    if collection is not None:
+        vectors = await embeddings.aembed_documents(questions)
+        results = [semantic_cache.get(vector) for vector in vectors]
+    
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+    
+    pending_questions = [questions[i] for i in pending]
+    pending_vectors = [vectors[i] for i in pending] if vectors is not None else None
+    context_batch = await _retrieve_batch(pending_questions, pending_vectors)
+    inputs = [
+        {"context": _build_context(docs), "question": question}
+        for question, docs in zip(pending_questions, context_batch)
+    ]
+    
+    if hasattr(rag_chain, "abatch"):
+        answers = await rag_chain.abatch(inputs, return_exceptions=True)
+    else:
+        answers = await asyncio.gather(*(_ainvoke(rag_chain, i) for i in inputs), return_exceptions=True)
+    
+    for i, answer, docs in zip(pending, answers, context_batch):
+        if isinstance(answer, Exception):
+            results[i] = answer
+            continue
+        results[i] = (answer, tuple(_unique_sources(docs)))
+        if vectors is not None:
+            semantic_cache.add(vectors[i], results[i])
+    return results
+
+@alru_cache(maxsize=CHAT_CACHE_SIZE)
+async def _answer(question: str):
+    """Answer a question through the batcher; repeated questions are served from the cache"""
+    return await chat_batcher.submit(question)
+
+def _clear_answer_caches():
+    """Drop cached answers (called when the document corpus changes)"""
+    _answer.cache_clear()
+    semantic_cache.clear()
+
+def _start_chat_batcher():
+    global chat_batcher
+    chat_batcher = ChatBatcher(_answer_batch)
+    chat_batcher.start()
+
+async def _check_ollama():
+    """Check that the Ollama server answers and has the chat model pulled"""
+    response = await ollama_client.get("/api/tags", timeout=2)
+    response.raise_for_status()
+    
+    model_names = [model.get("name", "") for model in orjson.loads(response.content).get("models", [])]
+    if not any(name.split(":")[0] == LLM_MODEL for name in model_names):
+        raise RuntimeError(f"Ollama model '{LLM_MODEL}' is not available (run: ollama pull {LLM_MODEL})")
+
+def _build_rag_components():
+    """Build the Ollama-backed RAG components (blocking, run in a worker thread)"""
+    import chromadb
+    
+    # Initialize embeddings (use same model as main/vector.py)
+    if TEI_URL:
+        embeddings = TEIEmbeddings(TEI_URL)
+    else:
+        embeddings = OllamaHTTPEmbeddings(ollama_client)
+    
+    # The Chroma collection built by main/vector.py, queried directly with our own
+    # embeddings (like LangChain's wrapper, no embedding function is attached to it)
+    client = chromadb.PersistentClient(path=str(PROJECT_ROOT / "main" / "chroma_db"))
+    collection = client.get_or_create_collection("my_collection", embedding_function=None)
     
-    if rag_chain is None or retriever is None:
+    # Create the RAG chain: prompt templating in Python, generation straight to Ollama
+    rag_chain = OllamaRAGChain(ollama_client)
+    
+    return rag_chain, embeddings, collection
+
+async def initialize_rag_system():
+    """Initialize the RAG system components once (idempotent, safe for concurrent callers)"""
+    global rag_chain, retriever, embeddings, collection, rag_ready
+    
+    async with _init_lock:
+        if rag_ready:
+            return True
+        
         try:
-            # Try to import and initialize the full RAG system
-            from langchain_ollama import OllamaLLM
-            from langchain_core.prompts import ChatPromptTemplate
-            
-            # Test Ollama connection first
-            model = OllamaLLM(model="llama3")
-            # Simple test to see if Ollama is responsive
-            test_response = model.invoke("test")
+            # Test Ollama connection first without blocking the event loop
+            await _check_ollama()
             
             # If we get here, Ollama is working
             print("Ollama is available, initializing full RAG system...")
-            
-            # Import the existing RAG system components
-            import chromadb
-            from langchain_chroma import Chroma
-            from langchain_ollama import OllamaEmbeddings
-            from langchain_core.output_parsers import StrOutputParser
-            
-            # Initialize embeddings (use same model as main/vector.py)
-            embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-            
-            # Initialize vector store (use same settings as main/vector.py)
-            persist_directory = os.path.join(os.path.dirname(__file__), '..', 'main', 'chroma_db')
-            vectorstore = Chroma(
-                collection_name="my_collection",
-                persist_directory=persist_directory,
-                embedding_function=embeddings
-            )
-            
-            # Create retriever (use same settings as main/vector.py)
-            retriever = vectorstore.as_retriever(
-                search_kwargs={"k": 5}
-            )
-            
-            # Create the RAG chain (use same template style as main/main.py)
-            template = """
-            Tu es un assistant qui répond à la question {question} uniquement en te basant sur le contexte suivant 
-            sans mentionner la question, le nom des documents ou leurs ID: {context}
-            """
-            
-            prompt = ChatPromptTemplate.from_template(template)
-            rag_chain = prompt | model | StrOutputParser()
-            
+            rag_chain, embeddings, collection = await asyncio.to_thread(_build_rag_components)
             print("Full RAG system initialized successfully!")
-            return True
             
         except Exception as e:
             print(f"Failed to initialize Ollama RAG system: {e}")
@@ -176,11 +703,14 @@ def initialize_rag_system():
             # Initialize mock system
             rag_chain = MockRAGChain()
             retriever = MockRetriever()
+            embeddings = None
+            collection = None
             
             print("Mock RAG system initialized successfully!")
-            return True
-    
-    return True
+        
+        _start_chat_batcher()
+        rag_ready = True
+        return True
 
 @app.get("/", response_model=dict)
 async def root():
@@ -193,11 +723,12 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
+    """Liveness: report the cached initialization state without probing anything"""
     try:
-        is_initialized = initialize_rag_system()
+        is_initialized = rag_ready
         return HealthResponse(
-            status="healthy",
-            message="RAG system is ready" if is_initialized else "RAG system initialization failed",
+            status="healthy" if is_initialized else "starting",
+            message="RAG system is ready" if is_initialized else "RAG system is starting",
             rag_system_loaded=is_initialized
         )
     except Exception as e:
@@ -207,6 +738,32 @@ async def health_check():
             rag_system_loaded=False
         )
 
+# A successful Ollama probe is trusted for this long; failures are never cached
+READY_PROBE_TTL = float(os.getenv("READY_PROBE_TTL", "30"))  # seconds
+_ollama_ok_until = 0.0
+
+@app.get("/ready", response_model=HealthResponse)
+async def readiness_check():
+    """Readiness: the RAG system is loaded and, unless in mock mode, Ollama answers quickly"""
+    global _ollama_ok_until
+    if not rag_ready:
+        raise HTTPException(status_code=503, detail="RAG system is starting")
+    
+    if collection is not None and time.monotonic() >= _ollama_ok_until:
+        try:
+            response = await ollama_client.get("/api/version", timeout=0.2)
+            response.raise_for_status()
+        except Exception as e:
+            _ollama_ok_until = 0.0
+            raise HTTPException(status_code=503, detail=f"Ollama not reachable: {str(e) or type(e).__name__}")
+        _ollama_ok_until = time.monotonic() + READY_PROBE_TTL
+    
+    return HealthResponse(
+        status="ready",
+        message="RAG system is ready" if collection is not None else "Mock RAG system is ready",
+        rag_system_loaded=True
+    )
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     try:
@@ -215,29 +772,19 @@ async def chat(message: ChatMessage):
         if not message.question or not message.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
         
-        # Initialize RAG system if not already done
-        if not initialize_rag_system():
+        # The RAG system is initialized once in the lifespan handler
+        if not rag_ready:
             raise HTTPException(status_code=503, detail="RAG system not available")
         
-        # Retrieve relevant context from documents
-        context_docs = retriever.invoke(message.question.strip())
-        
-        # Extract context and sources
-        context_text = "\n".join([doc.page_content for doc in context_docs])
-        sources = [doc.metadata.get("source", "unknown") for doc in context_docs]
-        
-        # Generate answer using RAG chain
-        answer = rag_chain.invoke({
-            "context": context_text,
-            "question": message.question.strip()
-        })
+        # Retrieve context and generate the answer (cached, batched with concurrent requests)
+        answer, sources = await _answer(message.question.strip())
         
         # Calculate processing time
         processing_time = asyncio.get_event_loop().time() - start_time
         
         return ChatResponse(
             answer=answer.strip(),
-            sources=list(set(sources)),  # Remove duplicates
+            sources=list(sources),
             timestamp=datetime.now(),
             processing_time=round(processing_time, 3)
         )
@@ -250,97 +797,188 @@ async def chat(message: ChatMessage):
             detail=f"Internal server error: {str(e)}"
         )
 
+def _sse(payload: dict) -> str:
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Stream the answer as server-sent events: sources first, then answer deltas"""
+    if not message.question or not message.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    if not rag_ready:
+        raise HTTPException(status_code=503, detail="RAG system not available")
+    
+    question = message.question.strip()
+    
+    async def event_stream():
+        start_time = asyncio.get_event_loop().time()
+        try:
+            # Send the sources first so the UI can show citations immediately
+            [context_docs] = await _retrieve_batch([question])
+            yield _sse({"sources": _unique_sources(context_docs)})
+            
+            inputs = {"context": _build_context(context_docs), "question": question}
+            async for delta in _astream(rag_chain, inputs):
+                yield _sse({"delta": delta})
+            
+            processing_time = asyncio.get_event_loop().time() - start_time
+            yield _sse({"done": True, "processing_time": round(processing_time, 3)})
+            
+        except Exception as e:
+            yield _sse({"error": f"Internal server error: {str(e)}"})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/sources", response_model=SourcesResponse)
 async def get_available_sources():
     """Get list of available document sources"""
-    try:
-        # Return mock sources for now
-        mock_sources = [
-            "attestation_interets.txt",
-            "certificat_scolarite_arabe.txt", 
-            "certificat_scolarite_Rayan.txt",
-            "cnops2.txt",
-            "decompte_remboursement.txt",
-            "demande_estivage.txt",
-            "remboursement_cnops1.txt",
-            "ticket_reservation.txt",
-            "tresorerie_generale_royaume.txt"
-        ]
-        
-        return SourcesResponse(sources=mock_sources)
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error retrieving sources: {str(e)}"
-        )
+    # Return mock sources for now (built once at import time)
+    return _MOCK_SOURCES_RESP
+
+# OCR pool -> queue its workers put their PID on when they start
+_ocr_pool_pids = {}
+
+def _get_ocr_pool():
+    global ocr_pool
+    if ocr_pool is None:
+        from ocr_system.main_ocr import init_file_worker
+        pids = multiprocessing.Queue()
+        ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=init_file_worker, initargs=(OCR_WORKERS, pids))
+        _ocr_pool_pids[ocr_pool] = pids
+    return ocr_pool
+
+def _kill_ocr_pool(pool):
+    """Kill the workers of an OCR pool; a timed-out job would otherwise keep its worker forever"""
+    global ocr_pool
+    if ocr_pool is pool:
+        ocr_pool = None  # the next upload starts a fresh pool
+    pids = _ocr_pool_pids.pop(pool, None)
+    pool.shutdown(wait=False, cancel_futures=True)
+    if pids is None:
+        return  # already killed by another timed-out job
+    # Other jobs still running in this pool fail with BrokenProcessPool
+    while True:
+        try:
+            pid = pids.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except ProcessLookupError:
+            pass
+    pids.close()
+
+@lru_cache(maxsize=1)
+def _get_ocr_system():
+    """OCRSystem used in this process to name and save extracted text"""
+    from ocr_system.main_ocr import OCRSystem
+    return OCRSystem(OCR_OUTPUT_DIR)
+
+async def _index_documents(ids: List[str], texts: List[str]):
+    """Add or replace documents in Chroma with one batched embedding call and one collection write"""
+    if collection is None:
+        # Mock mode: nothing to index
+        return
+    
+    vectors = await embeddings.aembed_documents(texts)
+    await asyncio.to_thread(
+        # upsert: a changed re-upload replaces its output file, and so its document ID
+        collection.upsert,
+        ids=ids,
+        embeddings=vectors,
+        documents=texts,
+        metadatas=[{"source": doc_id} for doc_id in ids]
+    )
 
 async def process_uploaded_file(filename: str, file_id: str):
     """Background task to process uploaded file with OCR"""
     try:
         # Update status to processing
-        processing_status[file_id] = {
+        await _set_status(file_id, {
             "status": "processing",
             "message": f"Extracting text from {filename}...",
             "filename": filename
-        }
+        })
         
-        # Get paths
-        project_root = Path(__file__).parent.parent
-        dataset_path = project_root / "dataset" / filename
-        venv_python = project_root / ".venv" / "bin" / "python"
+        dataset_path = DATASET_DIR / filename
         
-        # Run OCR system
-        cmd = [
-            str(venv_python),
-            "-m", "ocr_system.main_ocr", 
-            str(dataset_path)
-        ]
+        # Content that was already extracted (under any name) is not OCR'd again
+        ocr_system = _get_ocr_system()
+        fingerprint = await asyncio.to_thread(ocr_system.fingerprint, dataset_path)
+        processed = await asyncio.to_thread(ocr_system.processed_output, fingerprint)
+        if processed is not None:
+            dataset_path.unlink(missing_ok=True)
+            await _set_status(file_id, {
+                "status": "completed",
+                "message": f"File already processed: its text is in {processed.name}",
+                "filename": filename
+            })
+            return
         
-        # Execute OCR with timeout
-        result = subprocess.run(
-            cmd,
-            cwd=str(project_root),
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
+        # Extract text in the OCR process pool
+        from ocr_system.main_ocr import extract_text
+        
+        loop = asyncio.get_running_loop()
+        pool = _get_ocr_pool()
+        try:
+            text = await asyncio.wait_for(
+                loop.run_in_executor(pool, extract_text, str(dataset_path), str(OCR_OUTPUT_DIR)),
+                timeout=OCR_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            _kill_ocr_pool(pool)
+            raise
         
-        if result.returncode == 0:
+        if text is not None:
+            # Save the text next to the other OCR results, then index it right away
+            saved = await asyncio.to_thread(ocr_system.save_extracted_text, dataset_path, text, fingerprint)
+            if saved is not None:
+                output_file, content = saved
+                await _set_status(file_id, {
+                    "status": "processing",
+                    "message": f"Indexing {filename}...",
+                    "filename": filename
+                })
+                await _index_documents([output_file.name], [content.strip()])
+                
+                # New text is available: cached answers may be outdated
+                _clear_answer_caches()
+            
             # Success - delete the original file
             try:
                 dataset_path.unlink()  # Delete the uploaded file
-                processing_status[file_id] = {
+                await _set_status(file_id, {
                     "status": "completed",
                     "message": f"File processed successfully! Text extracted and ready for chatbot.",
                     "filename": filename
-                }
+                })
             except Exception as e:
-                processing_status[file_id] = {
+                await _set_status(file_id, {
                     "status": "completed",
                     "message": f"Text extracted successfully, but couldn't delete original file: {str(e)}",
                     "filename": filename
-                }
+                })
         else:
             # OCR failed
-            processing_status[file_id] = {
+            await _set_status(file_id, {
                 "status": "error",
-                "message": f"Failed to process file: {result.stderr}",
+                "message": f"Failed to process file: no text could be extracted from {filename}",
                 "filename": filename
-            }
+            })
             
-    except subprocess.TimeoutExpired:
-        processing_status[file_id] = {
+    except asyncio.TimeoutError:
+        await _set_status(file_id, {
             "status": "error", 
             "message": f"Processing timed out. File too large or complex.",
             "filename": filename
-        }
+        })
     except Exception as e:
-        processing_status[file_id] = {
+        await _set_status(file_id, {
             "status": "error",
             "message": f"Error processing file: {str(e)}",
             "filename": filename
-        }
+        })
 
 @app.post("/upload", response_model=UploadResponse)
 async def upload_file(
@@ -359,22 +997,24 @@ async def upload_file(
                 detail=f"File type not supported. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Validate file size (max 50MB)
-        content = await file.read()
-        if len(content) > 50 * 1024 * 1024:  # 50MB
-            raise HTTPException(
-                status_code=400,
-                detail="File too large. Maximum size is 50MB."
-            )
-        
-        # Save file to dataset folder
-        project_root = Path(__file__).parent.parent
-        dataset_dir = project_root / "dataset"
-        dataset_dir.mkdir(exist_ok=True)
-        
-        file_path = dataset_dir / file.filename
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream the upload to disk in chunks, enforcing the size limit (max 50MB) as we go.
+        # Write to a partial file first so an aborted upload never replaces an existing one.
+        file_path = DATASET_DIR / file.filename
+        partial_path = file_path.with_name(file_path.name + ".part")
+        total = 0
+        try:
+            async with aiofiles.open(partial_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    total += len(chunk)
+                    if total > MAX_UPLOAD_SIZE:
+                        raise HTTPException(
+                            status_code=400,
+                            detail="File too large. Maximum size is 50MB."
+                        )
+                    await f.write(chunk)
+            os.replace(partial_path, file_path)
+        finally:
+            partial_path.unlink(missing_ok=True)
         
         # Generate unique ID for tracking
         file_id = str(uuid.uuid4())
@@ -400,23 +1040,36 @@ async def upload_file(
 @app.get("/upload/status/{file_id}", response_model=ProcessingStatus)
 async def get_processing_status(file_id: str):
     """Get the processing status of an uploaded file"""
-    if file_id not in processing_status:
+    status = await _get_status(file_id)
+    if status is None:
         raise HTTPException(
             status_code=404,
             detail="File processing status not found"
         )
     
-    status = processing_status[file_id]
     return ProcessingStatus(**status)
 
 @app.get("/upload/status", response_model=List[ProcessingStatus])
 async def get_all_processing_status():
     """Get all file processing statuses"""
-    return [ProcessingStatus(**status) for status in processing_status.values()]
+    return [ProcessingStatus(**status) for status in await _get_all_statuses()]
 
 if __name__ == "__main__":
     import uvicorn
     print("Starting RAG Chatbot API...")
     print("Available at: http://localhost:8000")
     print("API Documentation: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop + httptools (from uvicorn[standard]); uvloop is not available on Windows.
+    # WEB_CONCURRENCY > 1 starts several worker processes: upload status is shared through
+    # Redis, but each worker keeps its own answer caches and Chroma client, and Chroma's
+    # local store is not safe for concurrent writers, so the default stays at one.
+    uvicorn.run(
+        "app:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        log_level="info"
+    )
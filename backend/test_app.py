@@ -2,7 +2,9 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
-import time
+import asyncio
+import os
+import sys
 from datetime import datetime
 
 app = FastAPI(title="Test RAG Chatbot API", version="1.0.0")
@@ -48,14 +50,14 @@ async def health_check():
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
-    start_time = time.time()
+    start_time = asyncio.get_event_loop().time()
     
     try:
         if not message.question or not message.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
         
         # Simulate processing time
-        time.sleep(1)
+        await asyncio.sleep(1)
         
         # Simple test responses based on keywords
         question = message.question.lower()
@@ -76,7 +78,7 @@ async def chat(message: ChatMessage):
             answer = f"Je traite votre question: '{message.question}'. Ceci est une réponse de test car le système RAG complet n'est pas encore connecté."
             sources = ["test_document.txt"]
         
-        processing_time = time.time() - start_time
+        processing_time = asyncio.get_event_loop().time() - start_time
         
         return ChatResponse(
             answer=answer,
@@ -113,8 +115,12 @@ if __name__ == "__main__":
     print("🌟 API will be available at: http://localhost:8000")
     print("📚 API docs will be available at: http://localhost:8000/docs")
     uvicorn.run(
-        app, 
+        "test_app:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
         host="0.0.0.0", 
         port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),  # same default as app.py
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info"
     )
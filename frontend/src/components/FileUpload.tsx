@@ -1,6 +1,12 @@
-import React, { useState, useCallback } from "react";
+import React, { useState, useCallback, useEffect, useRef } from "react";
 import styled from "styled-components";
 
+// Status polling backs off exponentially: quick to notice short jobs, light on long OCR runs
+const POLL_BASE_MS = 250;
+const POLL_MAX_INTERVAL_MS = 5000;
+// Give up on a job after this long (the backend allows 5 minutes of OCR per file, plus queueing)
+const POLL_DEADLINE_MS = 10 * 60 * 1000;
+
 interface FileUploadProps {
   onUploadStart: (filename: string) => void;
   onUploadComplete: (message: string) => void;
@@ -100,6 +106,20 @@ const FileUpload: React.FC<FileUploadProps> = ({
     message: string;
   } | null>(null);
   const [processingFileId, setProcessingFileId] = useState<string | null>(null);
+  const pollTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const unmounted = useRef(false);
+
+  // Stop polling when the component goes away
+  useEffect(() => {
+    unmounted.current = false;
+    return () => {
+      unmounted.current = true;
+      if (pollTimer.current !== null) {
+        clearTimeout(pollTimer.current);
+        pollTimer.current = null;
+      }
+    };
+  }, []);
 
   const supportedFormats = "PDF, DOCX, DOC, TXT, PNG, JPG, JPEG, TIFF, BMP, GIF";
 
@@ -129,15 +149,33 @@ const FileUpload: React.FC<FileUploadProps> = ({
       setUploadStatus({ type: 'info', message: 'File uploaded! Extracting text...' });
 
       // Poll for processing status
+      let pollAttempt = 0;
+      const pollDeadline = Date.now() + POLL_DEADLINE_MS;
+      const schedulePoll = () => {
+        if (unmounted.current) return;
+        if (Date.now() >= pollDeadline) {
+          const message = 'Text extraction is taking too long, please try again later';
+          setUploadStatus({ type: 'error', message });
+          onUploadError(message);
+          setIsUploading(false);
+          setProcessingFileId(null);
+          return;
+        }
+        const delay = Math.min(POLL_MAX_INTERVAL_MS, POLL_BASE_MS * 2 ** pollAttempt++);
+        pollTimer.current = setTimeout(pollStatus, delay);
+      };
       const pollStatus = async () => {
+        pollTimer.current = null;
         try {
           const statusResponse = await fetch(`http://localhost:8000/upload/status/${result.file_id}`);
+          if (unmounted.current) return;
           if (statusResponse.ok) {
             const status = await statusResponse.json();
+            if (unmounted.current) return;
             
             if (status.status === 'processing') {
               setUploadStatus({ type: 'info', message: status.message });
-              setTimeout(pollStatus, 2000); // Poll every 2 seconds
+              schedulePoll();
             } else if (status.status === 'completed') {
               setUploadStatus({ type: 'success', message: status.message });
               onUploadComplete(status.message);
@@ -149,15 +187,17 @@ const FileUpload: React.FC<FileUploadProps> = ({
               setIsUploading(false);
               setProcessingFileId(null);
             }
+          } else {
+            schedulePoll();
           }
         } catch (error) {
           console.error('Error polling status:', error);
-          setTimeout(pollStatus, 3000); // Retry after 3 seconds
+          schedulePoll();
         }
       };
 
       // Start polling
-      setTimeout(pollStatus, 1000);
+      schedulePoll();
 
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Upload failed';
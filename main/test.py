@@ -1,8 +1,13 @@
 from langchain_ollama import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
-from vector import retriever
+from vector import retrieve_batch, embeddings, embedding_model, new_manifest, OLLAMA_KEEP_ALIVE, ollama_client_kwargs
+import numpy as np
+import asyncio
+import hashlib
+import json
+import os
 
-model = OllamaLLM(model="llama3")
+model = OllamaLLM(model="llama3", keep_alive=OLLAMA_KEEP_ALIVE, client_kwargs=ollama_client_kwargs)
 
 template = """
 Tu es un assistant qui répond à la question {question} uniquement en te basant sur le contexte suivant 
@@ -12,7 +17,62 @@ sans mentionner la question, le nom des documents ou leurs ID: {context}
 prompt = ChatPromptTemplate.from_template(template)
 chain = prompt | model
 
-def process_questions(input_file="questions.txt", output_file="answers.txt"):
+# Questions answered concurrently; keep it at or below the Ollama server's OLLAMA_NUM_PARALLEL
+# (start Ollama with e.g. OLLAMA_NUM_PARALLEL=4 OLLAMA_MAX_LOADED_MODELS=2 so the chat and
+# embedding models stay loaded side by side)
+CONCURRENCY = int(os.getenv("QUESTION_CONCURRENCY", "4"))
+
+# Near-duplicate questions (cosine similarity above the threshold) reuse a previous answer;
+# same variable and default as the backend's semantic cache (backend/app.py)
+SEMANTIC_CACHE_PATH = "semantic_cache.npz"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+
+# Answer pairs written between flushes of the output file
+FLUSH_EVERY = 16
+
+class SemanticCache:
+    """Previous answers looked up by inner product of normalized question embeddings, kept across runs"""
+
+    def __init__(self, path, fingerprint, threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.threshold = threshold
+        self.vectors = []
+        self.answers = []
+        try:
+            with np.load(path) as data:
+                # Answers are only valid for the same embedding model and indexed corpus
+                if str(data["fingerprint"]) == fingerprint:
+                    self.vectors = list(data["vectors"])
+                    self.answers = [str(answer) for answer in data["answers"]]
+        except (FileNotFoundError, KeyError, ValueError):
+            pass
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, vector):
+        if not self.vectors:
+            return None
+        scores = np.stack(self.vectors) @ self._normalize(vector)
+        best = int(np.argmax(scores))
+        return self.answers[best] if scores[best] > self.threshold else None
+
+    def add(self, vector, answer):
+        self.vectors.append(self._normalize(vector))
+        self.answers.append(answer)
+
+    def save(self):
+        if self.vectors:
+            np.savez(self.path, fingerprint=self.fingerprint, vectors=np.stack(self.vectors), answers=np.array(self.answers))
+
+def corpus_fingerprint():
+    return hashlib.sha256(json.dumps([embedding_model, new_manifest], sort_keys=True).encode("utf-8")).hexdigest()
+
+async def process_questions(input_file="questions.txt", output_file="answers.txt", concurrency=CONCURRENCY):
 
     try:
         # Read all questions
@@ -25,33 +85,65 @@ def process_questions(input_file="questions.txt", output_file="answers.txt"):
         
         print(f"Found {len(questions)} questions to process...\n")
         
-        # Open output file for writing
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for i, question in enumerate(questions, 1):
+        sem = asyncio.Semaphore(concurrency)
+        cache = SemanticCache(SEMANTIC_CACHE_PATH, corpus_fingerprint())
+        
+        # Embed all questions in batches, then retrieve contexts for the ones without a cached
+        # answer in a single multi-query vector store search
+        vectors = await asyncio.to_thread(embeddings.embed_documents, questions)
+        pending = [i for i, vector in enumerate(vectors, 1) if cache.get(vector) is None]
+        contexts = {}
+        if pending:
+            contexts = dict(zip(pending, await asyncio.to_thread(retrieve_batch, [vectors[i - 1] for i in pending])))
+        
+        async def handle(i, question, vector):
+            async with sem:
                 print(f"Processing question {i}/{len(questions)}: {question[:50]}...")
                 
                 try:
-                    # Get context and generate answer
-                    context = retriever.invoke(question)
-                    answer = chain.invoke({"context": context, "question": question})
-                    
-                    # Write to file
-                    f.write(f"{question}\n")
-                    f.write(f"{answer}\n")
-                    f.write("\n")  # Empty line between Q&A pairs
+                    # Reuse the answer of a near-duplicate question if there is one
+                    answer = cache.get(vector)
+                    if answer is not None:
+                        print(f"✓ Completed {i} (cached)\n")
+                        return answer
                     
-                    # Flush to ensure it's written (useful for monitoring progress)
-                    f.flush()
-                    
-                    print(f"✓ Completed\n")
+                    # Generate the answer from the prefetched context
+                    answer = await chain.ainvoke({"context": contexts[i], "question": question})
+                    cache.add(vector, answer)
+                    print(f"✓ Completed {i}\n")
+                    return answer
                     
                 except Exception as e:
-                    print(f"✗ Error processing question: {e}\n")
-                    # Write error to file
-                    f.write(f"{question}\n")
-                    f.write(f"ERROR: {str(e)}\n")
-                    f.write("\n")
-                    f.flush()
+                    print(f"✗ Error processing question {i}: {e}\n")
+                    return e
+        
+        # Answers are written in the original question order as soon as every earlier one is
+        # done, instead of all at the end; the file is flushed every FLUSH_EVERY pairs
+        with open(output_file, 'w', encoding='utf-8') as f:
+            done = {}
+            next_index = 1
+            
+            def write_ready():
+                nonlocal next_index
+                while next_index in done:
+                    result = done.pop(next_index)
+                    f.write(f"{questions[next_index - 1]}\n")
+                    if isinstance(result, Exception):
+                        f.write(f"ERROR: {str(result)}\n")
+                    else:
+                        f.write(f"{result}\n")
+                    f.write("\n")  # Empty line between Q&A pairs
+                    if next_index % FLUSH_EVERY == 0:
+                        f.flush()
+                    next_index += 1
+            
+            async def answer_and_write(i, question, vector):
+                done[i] = await handle(i, question, vector)
+                write_ready()
+            
+            # Overlap the Ollama calls, at most `concurrency` at a time
+            await asyncio.gather(*(answer_and_write(i, q, v) for i, (q, v) in enumerate(zip(questions, vectors), 1)))
+        cache.save()
         
         print(f"\n{'='*50}")
         print(f"✓ All questions processed!")
@@ -65,4 +157,4 @@ def process_questions(input_file="questions.txt", output_file="answers.txt"):
 
 if __name__ == "__main__":
     # Run the batch processing
-    process_questions()
\ No newline at end of file
+    asyncio.run(process_questions())
\ No newline at end of file
@@ -2,6 +2,38 @@ import json
 import csv
 import sys
 
+try:
+    import ijson
+    JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:  # fall back to loading the whole file
+    ijson = None
+    JSON_ERRORS = (json.JSONDecodeError,)
+
+def _flat(d, parent_key='', sep='_'):
+    """
+    Yield the (key, value) pairs of a flattened nested dictionary.
+    
+    Walks the nesting with an explicit stack of item iterators instead of
+    recursion, so no intermediate dicts are built and keys come out in the
+    same depth-first order as before.
+    """
+    stack = [(iter(d.items()), parent_key)]
+    while stack:
+        items, prefix = stack[-1]
+        for k, v in items:
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+            
+            if isinstance(v, dict):
+                stack.append((iter(v.items()), new_key))
+                break
+            elif isinstance(v, list):
+                # Convert lists to JSON strings to preserve structure
+                yield new_key, json.dumps(v, ensure_ascii=False)
+            else:
+                yield new_key, v
+        else:
+            stack.pop()
+
 def flatten_dict(d, parent_key='', sep='_'):
     """
     Flatten a nested dictionary structure.
@@ -14,19 +46,34 @@ def flatten_dict(d, parent_key='', sep='_'):
     Returns:
         Flattened dictionary
     """
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep=sep).items())
-        elif isinstance(v, list):
-            # Convert lists to JSON strings to preserve structure
-            items.append((new_key, json.dumps(v, ensure_ascii=False)))
-        else:
-            items.append((new_key, v))
+    return dict(_flat(d, parent_key, sep))
+
+def iter_records(json_file):
+    """
+    Yield the records of a JSON file (a single object or an array of objects).
     
-    return dict(items)
+    With ijson installed the file is streamed one record at a time instead of
+    being loaded into memory whole.
+    """
+    if ijson is None:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        elif not isinstance(data, list):
+            raise ValueError("JSON must be an object or array of objects")
+        yield from data
+        return
+    
+    with open(json_file, 'rb') as f:
+        head = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')[:1]
+        f.seek(0)
+        if head == b'[':
+            yield from ijson.items(f, 'item', use_float=True)
+        elif head == b'{':
+            yield from ijson.items(f, '', use_float=True)
+        else:
+            raise ValueError("JSON must be an object or array of objects")
 
 def json_to_csv(json_file, csv_file):
     """
@@ -37,45 +84,36 @@ def json_to_csv(json_file, csv_file):
         csv_file: Path to output CSV file
     """
     try:
-        # Read JSON file
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Handle both single object and array of objects
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            print("Error: JSON must be an object or array of objects")
-            return
+        # Pass 1: collect all unique keys across all records
+        all_keys = set()
+        count = 0
+        for record in iter_records(json_file):
+            all_keys.update(flatten_dict(record))
+            count += 1
         
-        if not data:
+        if not count:
             print("Error: JSON file is empty")
             return
         
-        # Flatten all records
-        flattened_data = [flatten_dict(record) for record in data]
-        
-        # Get all unique keys across all records
-        all_keys = set()
-        for record in flattened_data:
-            all_keys.update(record.keys())
-        
         # Sort keys for consistent column order
         fieldnames = sorted(all_keys)
         
-        # Write to CSV
+        # Pass 2: flatten and write one record at a time
+        # (positional rows: no per-cell fieldname lookups in DictWriter)
         with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(flattened_data)
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            for record in iter_records(json_file):
+                flat = flatten_dict(record)
+                writer.writerow([flat.get(key, '') for key in fieldnames])
         
         print(f"✓ Successfully converted {json_file} to {csv_file}")
-        print(f"  Records: {len(flattened_data)}")
+        print(f"  Records: {count}")
         print(f"  Columns: {len(fieldnames)}")
         
     except FileNotFoundError:
         print(f"Error: File '{json_file}' not found")
-    except json.JSONDecodeError as e:
+    except JSON_ERRORS as e:
         print(f"Error: Invalid JSON format - {e}")
     except Exception as e:
         print(f"Error: {e}")
@@ -1,46 +1,284 @@
 from langchain_ollama import OllamaEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+import hashlib
+import json
+import sqlite3
+import threading
+import httpx
 import os
 
-# --- Load text files ---
+# --- Paths ---
 base_dir = os.path.dirname(os.path.abspath(__file__))
 text_folder = os.path.join(base_dir, "..", "ocr_results")
 
+# --- Embeddings & Vector Store ---
+class CachedEmbeddings(Embeddings):
+    """Embeddings with a persistent sqlite cache keyed by SHA-256 of model + text"""
+
+    def __init__(self, embeddings, model, cache_path, batch_size=64, workers=4):
+        self.embeddings = embeddings
+        self.model = model
+        self.batch_size = batch_size
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, vec BLOB)")
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model}:{text}".encode("utf-8")).hexdigest()
+
+    def _embed_in_batches(self, texts):
+        # A few batches in flight at once. Sync calls in threads rather than asyncio.run: the
+        # async client would stay bound to a closed loop for callers that run their own loop.
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(self.embeddings.embed_documents, batches)
+        return [vector for batch in results for vector in batch]
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        cached = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under sqlite's variable limit
+                chunk = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vec FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                cached.update((key, array("f", vec).tolist()) for key, vec in rows)
+        
+        # Only cache misses go to Ollama
+        misses = list(dict.fromkeys(key for key in keys if key not in cached))
+        if misses:
+            texts_by_key = dict(zip(keys, texts))
+            vectors = self._embed_in_batches([texts_by_key[key] for key in misses])
+            with self._lock, self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache(key, vec) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in zip(misses, vectors)]
+                )
+            cached.update(zip(misses, vectors))
+        
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+# Switching models (e.g. to a Q8_0 quantized build) requires rebuilding ./chroma_db:
+# vectors from different models or quantizations must not be mixed in one collection
+embedding_model = os.getenv("EMBEDDING_MODEL", "mxbai-embed-large")
+
+# One pooled keep-alive connection set per Ollama client instead of a handshake per call, and
+# models kept resident between calls; shared with the chat model in test.py
+OLLAMA_KEEP_ALIVE = int(os.getenv("OLLAMA_KEEP_ALIVE", "1800"))  # seconds
+ollama_client_kwargs = {
+    "timeout": None,
+    "limits": httpx.Limits(max_connections=32, max_keepalive_connections=32)
+}
+
+embeddings = CachedEmbeddings(
+    OllamaEmbeddings(model=embedding_model, keep_alive=OLLAMA_KEEP_ALIVE, client_kwargs=ollama_client_kwargs),
+    model=embedding_model,
+    cache_path=os.path.join(base_dir, "embedding_cache.sqlite3")
+)
+
+# Vector store backend: "chroma" (default, shared with the backend) or "faiss" (HNSW graph,
+# logarithmic search time for large corpora; needs faiss-cpu and langchain-community)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma").lower()
+db_location = "./faiss_index" if VECTOR_STORE == "faiss" else "./chroma_db"
+
+# Past this many vectors the FAISS store compresses them with OPQ + IVF-PQ (16 bytes each
+# instead of d * 4); below it a flat HNSW graph is both smaller to manage and more exact
+FAISS_PQ_MIN_VECTORS = int(os.getenv("FAISS_PQ_MIN_VECTORS", "200000"))
+
+def tune_faiss_index(index):
+    """Apply search-time parameters, which are not all persisted with the index"""
+    import faiss
+    
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = 64
+    else:
+        faiss.extract_index_ivf(index).nprobe = 16
+
+def build_faiss_store(documents, vectors):
+    """Build a FAISS HNSW index over precomputed vectors"""
+    import faiss
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    
+    # Unit-length vectors: cosine similarity is a bare inner product, no per-candidate norms
+    vectors = np.asarray(vectors, dtype="float32")
+    faiss.normalize_L2(vectors)
+    
+    d = vectors.shape[1]
+    if len(vectors) >= FAISS_PQ_MIN_VECTORS:
+        # OPQ rotation + IVF-PQ: 4096 lists, 16 sub-quantizers of 8 bits (d must be a multiple of 16)
+        quantizer = faiss.IndexFlatIP(d)
+        ivfpq = faiss.IndexIVFPQ(quantizer, d, 4096, 16, 8, faiss.METRIC_INNER_PRODUCT)
+        index = faiss.IndexPreTransform(faiss.OPQMatrix(d, 16), ivfpq)
+        index.train(vectors)
+    else:
+        index = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+    index.add(vectors)
+    tune_faiss_index(index)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore({doc.id: doc for doc in documents}),
+        index_to_docstore_id=dict(enumerate(doc.id for doc in documents)),
+        # Vectors are normalized above and by retrieve_batch; LangChain's own normalize_L2 only
+        # applies to Euclidean distance. The retriever's raw query vector ranks the same, as its
+        # norm scales every inner product alike
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+if VECTOR_STORE == "faiss":
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    try:
+        # The pickled docstore is written by build_faiss_store below, not downloaded
+        vector_store = FAISS.load_local(
+            db_location, embeddings, allow_dangerous_deserialization=True,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        if vector_store.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+            raise ValueError("index built with another metric")
+        tune_faiss_index(vector_store.index)
+        indexed_ids = set(vector_store.index_to_docstore_id.values())
+    except Exception:
+        # Missing or outdated index: rebuilt below
+        vector_store = None
+        indexed_ids = set()
+else:
+    vector_store = Chroma(
+        collection_name="my_collection",
+        persist_directory=db_location,
+        embedding_function=embeddings
+    )
+    indexed_ids = set(vector_store._collection.get(include=[])["ids"])
+
+# --- Load text files (incrementally) ---
+# The manifest records filename -> (mtime, sha256) of what is indexed; documents use their
+# filename as a stable ID (as the backend does for uploads), so only new or changed files
+# are embedded and removed files are deleted from the index
+manifest_path = os.path.join(db_location, "manifest.json")
+try:
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+except (FileNotFoundError, ValueError):
+    manifest = {}
+
+def read_text(filename):
+    with open(os.path.join(text_folder, filename), "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+def read_texts(filenames, workers=8):
+    """Read several text files, overlapping the open/read latency in a thread pool"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(filenames, pool.map(read_text, filenames)))
+
+def make_document(filename, content):
+    return Document(page_content=content, metadata={"source": filename}, id=filename)
+
 docs = []
 ids = []
+new_manifest = {}
 
-# Read all .txt files in the folder
-for idx, filename in enumerate(os.listdir(text_folder)):
-    if filename.lower().endswith(".txt"):
-        file_path = os.path.join(text_folder, filename)
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            if not content:
-                continue  # skip empty files
-            docs.append(Document(
-                page_content=content,
-                metadata={"source": filename},
-                id=str(idx)
-            ))
-            ids.append(str(idx))
+# Find new or changed .txt files in the folder from their mtimes
+# (scandir entries carry the file type and stat results, no per-file path join + stat)
+candidates = {}
+with os.scandir(text_folder) as it:
+    entries = sorted((entry for entry in it if entry.name.lower().endswith(".txt") and entry.is_file()), key=lambda entry: entry.name)
+for entry in entries:
+    filename = entry.name
+    mtime = entry.stat().st_mtime
+    previous = manifest.get(filename)
+    if previous and previous["mtime"] == mtime and filename in indexed_ids:
+        new_manifest[filename] = previous
+        continue  # unchanged since last run
+    candidates[filename] = mtime
 
-# --- Embeddings & Vector Store ---
-embeddings = OllamaEmbeddings(model="mxbai-embed-large")
+# Read them concurrently, then keep the ones whose content actually changed
+for filename, content in read_texts(list(candidates)).items():
+    if not content:
+        continue  # skip empty files
+    
+    previous = manifest.get(filename)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    new_manifest[filename] = {"mtime": candidates[filename], "sha256": digest}
+    if previous and previous["sha256"] == digest and filename in indexed_ids:
+        continue  # touched but identical
+    
+    docs.append(make_document(filename, content))
+    ids.append(filename)
 
-db_location = "./chroma_db"
-add_docs = not os.path.exists(db_location)
+# Removed files, re-indexed files and IDs from older index layouts
+stale_ids = [doc_id for doc_id in indexed_ids if doc_id not in new_manifest or doc_id in ids]
 
-vector_store = Chroma(
-    collection_name="my_collection",
-    persist_directory=db_location,
-    embedding_function=embeddings
-)
+if VECTOR_STORE == "faiss":
+    # HNSW graphs have no cheap deletes: rebuild on any change (vectors come from the cache)
+    if docs or stale_ids or vector_store is None:
+        changed = {doc.id: doc for doc in docs}
+        unchanged = read_texts([filename for filename in new_manifest if filename not in changed])
+        all_docs = [changed.get(filename) or make_document(filename, unchanged[filename]) for filename in new_manifest]
+        if not all_docs:
+            raise RuntimeError(f"No documents to index in {text_folder}")
+        vectors = embeddings.embed_documents([doc.page_content for doc in all_docs])
+        vector_store = build_faiss_store(all_docs, vectors)
+        vector_store.save_local(db_location)
+else:
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+    
+    if docs:
+        texts = [doc.page_content for doc in docs]
+        vectors = embeddings.embed_documents(texts)
+        # Vectors are already computed: write them straight to the collection
+        vector_store._collection.add(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[doc.metadata for doc in docs]
+        )
 
-if add_docs:
-    vector_store.add_documents(documents=docs, ids=ids)
+if docs or stale_ids or new_manifest != manifest:
+    os.makedirs(db_location, exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(new_manifest, f, indent=2)
 
 # --- Retriever ---
 retriever = vector_store.as_retriever(
     search_kwargs={"k": 5}
 )
+
+def retrieve_batch(vectors, k=5):
+    """Top-k documents for several precomputed query vectors in one vector store search"""
+    if VECTOR_STORE == "faiss":
+        import numpy as np
+        
+        # One (nq, d) query matrix instead of nq separate searches
+        queries = np.asarray(vectors, dtype="float32")
+        faiss.normalize_L2(queries)
+        _, rows = vector_store.index.search(queries, k)
+        return [
+            [vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)]) for i in row if i != -1]
+            for row in rows
+        ]
+    
+    results = vector_store._collection.query(
+        query_embeddings=vectors, n_results=k, include=["documents", "metadatas"]
+    )
+    return [
+        [
+            Document(page_content=content, metadata=metadata or {}, id=doc_id)
+            for doc_id, content, metadata in zip(*row)
+        ]
+        for row in zip(results["ids"], results["documents"], results["metadatas"])
+    ]
@@ -1,93 +1,237 @@
 import PyPDF2
 import pdfplumber
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from docx import Document
+from PIL import Image
 import os
-import tempfile
+import re
+import codecs
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from .ocr_processor import OCRProcessor
 
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+try:
+    import fitz  # PyMuPDF: renders pages in-process instead of a pdftoppm run per page
+except ImportError:
+    fitz = None
+
+def _page_workers(pages):
+    """Processes used to OCR one PDF's pages: OCR_PAGE_WORKERS if set, else one per CPU"""
+    budget = int(os.getenv("OCR_PAGE_WORKERS", "0")) or os.cpu_count() or 1
+    return max(1, min(pages, budget))
+
+def _init_ocr_worker():
+    # One Tesseract thread per worker process: the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+# Runs of readable characters (letters incl. Latin-1 accents, digits, punctuation) in raw
+# .doc bytes, as 8-bit text and as UTF-16LE text (Word stores text in one of the two)
+_DOC_TEXT_RE = re.compile(rb'[a-zA-Z\xc0-\xff0-9\s\.,;:!?\-\(\)]{10,}')
+_DOC_UTF16_TEXT_RE = re.compile(rb'(?:[a-zA-Z\xc0-\xff0-9\s\.,;:!?\-\(\)]\x00){10,}')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Extracted PDF/DOCX text is cached here, keyed by OCR settings, path, mtime and size
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.expanduser("~/.cache/ocr_system"))
+_CACHE_VERSION = 2  # bump when extraction output changes
+
+# Rasters above this many pixels are downscaled before OCR (Tesseract time scales with pixels)
+MAX_OCR_PIXELS = 8_000_000
+
+# Pages rendered per pdf2image call when PyMuPDF is not installed (a poppler run per call)
+RENDER_BATCH_PAGES = 8
+
+def _render_pages(pdf_path, page_numbers, dpi=200, document=None):
+    """Yield 1-based PDF pages as grayscale PIL images (None if not rendered), in order"""
+    # Rendered in grayscale: OCR does not use colour, and it is a third of the bytes
+    if document is not None:
+        for page_number in page_numbers:
+            pixmap = document[page_number - 1].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            yield Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        return
+    
+    # Without PyMuPDF, one convert_from_path call per run of consecutive pages
+    runs = []
+    for page_number in page_numbers:
+        if runs and page_number == runs[-1][-1] + 1 and len(runs[-1]) < RENDER_BATCH_PAGES:
+            runs[-1].append(page_number)
+        else:
+            runs.append([page_number])
+    for run in runs:
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=run[0], last_page=run[-1], grayscale=True)
+        yield from images[:len(run)]
+        yield from [None] * (len(run) - len(images))
+
+def _ocr_page_range(pdf_path, page_numbers, dpi=200):
+    """Render and OCR a segment of PDF pages in memory (module-level so it can run in a worker process)"""
+    # One document open and one OCR engine for the whole segment
+    document = fitz.open(pdf_path) if fitz is not None else None
+    ocr = OCRProcessor()
+    texts = []
+    try:
+        for image in _render_pages(pdf_path, page_numbers, dpi, document):
+            if image is None:
+                texts.append("")
+                continue
+            
+            pixels = image.size[0] * image.size[1]
+            if pixels > MAX_OCR_PIXELS:
+                scale = (MAX_OCR_PIXELS / pixels) ** 0.5
+                image.thumbnail((int(image.size[0] * scale), int(image.size[1] * scale)), Image.LANCZOS)
+            
+            texts.append(ocr.extract_text_from_pil(image))
+    finally:
+        if document is not None:
+            document.close()
+    return texts
+
 class DocumentProcessor:
     def __init__(self):
         self.ocr = OCRProcessor()
+        # txt_path -> ((mtime_ns, size), text) for files already read
+        self._txt_cache = {}
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Try text extraction first, then OCR if needed"""
-        text = ""
+    def _disk_cached(self, path, extract):
+        """Return extract(path), reusing the text cached for an unchanged file"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return extract(path)
         
-        # First attempt: Direct text extraction using pdfplumber
+        key = hashlib.sha1(
+            f"{_CACHE_VERSION}:{self.ocr.config_tag}:{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")
+        ).hexdigest()
+        cache_file = os.path.join(OCR_CACHE_DIR, f"{key}.txt")
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text += f"--- Page {page_num + 1} ---\n{page_text.strip()}\n\n"
-        except Exception as e:
-            print(f"Direct text extraction failed: {e}")
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            pass
+        
+        text = extract(path)
+        
+        if text:
+            try:
+                os.makedirs(OCR_CACHE_DIR, exist_ok=True)
+                # Write then rename, so concurrent readers never see a partial file
+                partial_file = f"{cache_file}.{os.getpid()}.part"
+                with open(partial_file, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(partial_file, cache_file)
+            except OSError as e:
+                print(f"Could not cache extracted text: {e}")
+        return text
+    
+    def extract_text_from_pdf(self, pdf_path):
+        """Try text extraction first, then OCR if needed (cached per file version)"""
+        return self._disk_cached(pdf_path, self._extract_text_from_pdf)
+    
+    def needs_ocr(self, pdf_path, sample_pages=4):
+        """Cheap check of the text layer on pages spread over the PDF: True only if none of
+        them has any text, so a short cover page does not make a text PDF look scanned"""
+        try:
+            with open(pdf_path, 'rb') as file:
+                pages = PyPDF2.PdfReader(file).pages
+                count = len(pages)
+                sampled = sorted({i * (count - 1) // max(1, sample_pages - 1) for i in range(sample_pages)}) if count else []
+                return not any((pages[i].extract_text() or "").strip() for i in sampled)
+        except Exception:
+            return False  # let the full extraction decide
+    
+    def _extract_text_from_pdf(self, pdf_path):
+        """Try text extraction first, then OCR the pages that have no text layer"""
+        page_texts = []  # stripped text per page, "" where nothing was extracted
         
-        # Second attempt: Try PyPDF2 if pdfplumber failed
-        if len(text.strip()) < 50:
+        # First attempt: Direct text extraction using pdfplumber, skipped for scanned PDFs
+        # (its layout analysis is the slow part and finds nothing on page images)
+        if not self.needs_ocr(pdf_path):
+            try:
+                with pdfplumber.open(pdf_path) as pdf:
+                    page_texts = [(page.extract_text() or "").strip() for page in pdf.pages]
+            except Exception as e:
+                print(f"Direct text extraction failed: {e}")
+        
+        # Second attempt: Try PyPDF2 for the pages pdfplumber found nothing on
+        if not page_texts or not all(page_texts):
             try:
                 with open(pdf_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
-                    for page_num, page in enumerate(pdf_reader.pages):
-                        page_text = page.extract_text()
-                        if page_text and page_text.strip():
-                            text += f"--- Page {page_num + 1} ---\n{page_text.strip()}\n\n"
+                    if not page_texts:
+                        page_texts = [""] * len(pdf_reader.pages)
+                    for page_num, page in enumerate(pdf_reader.pages[:len(page_texts)]):
+                        if not page_texts[page_num]:
+                            page_texts[page_num] = (page.extract_text() or "").strip()
             except Exception as e:
                 print(f"PyPDF2 extraction failed: {e}")
         
-        # If still no substantial text found, use OCR
-        if len(text.strip()) < 50:
+        # If no substantial text found at all, OCR the whole document
+        if sum(len(page_text) for page_text in page_texts) < 50:
             print(f"PDF appears to be image-based, using OCR...")
-            text = self.ocr_pdf_pages(pdf_path)
+            return self.ocr_pdf_pages(pdf_path).strip()
+        
+        # Hybrid PDF: OCR only the pages without extractable text
+        empty_pages = [page_num + 1 for page_num, page_text in enumerate(page_texts) if not page_text]
+        if empty_pages:
+            print(f"{len(empty_pages)} page(s) without a text layer, using OCR for them...")
+            for page_number, page_text in zip(empty_pages, self._ocr_pages(pdf_path, empty_pages)):
+                page_texts[page_number - 1] = (page_text or "").strip()
         
-        return text.strip()
+        return "".join(
+            f"--- Page {page_num + 1} ---\n{page_text}\n\n"
+            for page_num, page_text in enumerate(page_texts) if page_text
+        ).strip()
     
-    def ocr_pdf_pages(self, pdf_path):
-        """Convert PDF pages to images and OCR them"""
+    def _ocr_pages(self, pdf_path, page_numbers, dpi=200):
+        """OCR the given 1-based PDF pages, returning their texts in the same order"""
+        page_numbers = list(page_numbers)
+        try:
+            # One contiguous segment of pages per worker; each worker renders its own pages,
+            # so page images never cross process boundaries
+            workers = _page_workers(len(page_numbers))
+            if workers > 1:
+                size, extra = divmod(len(page_numbers), workers)
+                bounds = [i * size + min(i, extra) for i in range(workers + 1)]
+                segments = [page_numbers[start:end] for start, end in zip(bounds, bounds[1:])]
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker) as pool:
+                    results = pool.map(_ocr_page_range, [pdf_path] * workers, segments, [dpi] * workers)
+                    return [text for segment_texts in results for text in segment_texts]
+            return _ocr_page_range(pdf_path, page_numbers, dpi)
+        except Exception as e:
+            print(f"Error during PDF OCR: {e}")
+            return [""] * len(page_numbers)
+    
+    def ocr_pdf_pages(self, pdf_path, dpi=200):
+        """Render PDF pages to images and OCR them, one page per worker, without temporary files"""
         text = ""
-        temp_dir = None
         
         try:
-            # Create temporary directory for images
-            temp_dir = tempfile.mkdtemp()
-            
-            # Convert PDF to images with high DPI for better OCR
-            print("Converting PDF pages to images...")
-            images = convert_from_path(pdf_path, dpi=300, fmt='png', output_folder=temp_dir)
-            
-            for i, image in enumerate(images):
-                print(f"Processing page {i+1}/{len(images)} with OCR...")
-                
-                # Save temporary image
-                temp_path = os.path.join(temp_dir, f"page_{i}.png")
-                image.save(temp_path, "PNG")
-                
-                # Extract text using OCR
-                page_text = self.ocr.extract_text_from_image(temp_path)
-                if page_text and page_text.strip():
-                    text += f"--- Page {i+1} ---\n{page_text.strip()}\n\n"
-                
-                # Clean up temporary file
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
-                
+            if fitz is not None:
+                with fitz.open(pdf_path) as document:
+                    page_count = document.page_count
+            else:
+                page_count = pdfinfo_from_path(pdf_path)["Pages"]
         except Exception as e:
             print(f"Error during PDF OCR: {e}")
-        finally:
-            # Clean up temporary directory
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    import shutil
-                    shutil.rmtree(temp_dir)
-                except:
-                    pass
+            return text
+        
+        print(f"Processing {page_count} pages with OCR...")
+        page_texts = self._ocr_pages(pdf_path, range(1, page_count + 1), dpi)
+        
+        for i, page_text in enumerate(page_texts):
+            if page_text and page_text.strip():
+                text += f"--- Page {i+1} ---\n{page_text.strip()}\n\n"
         
         return text
     
     def extract_text_from_docx(self, docx_path):
+        """Extract text from Word documents (.docx and .doc), cached per file version"""
+        return self._disk_cached(docx_path, self._extract_text_from_docx)
+    
+    def _extract_text_from_docx(self, docx_path):
         """Extract text from Word documents (.docx and .doc)"""
         # First try with python-docx (works for .docx files)
         try:
@@ -155,27 +299,15 @@ class DocumentProcessor:
             with open(doc_path, 'rb') as file:
                 content = file.read()
                 
-            # Try to decode and extract readable text
-            text_parts = []
-            
-            # Look for text patterns in the binary data
-            import re
-            
-            # Try different encodings for text extraction
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'utf-16']:
-                try:
-                    decoded = content.decode(encoding, errors='ignore')
-                    # Extract sequences of printable characters
-                    readable_text = re.findall(r'[a-zA-ZÀ-ÿ0-9\s\.,;:!?\-\(\)]{10,}', decoded)
-                    text_parts.extend(readable_text)
-                except:
-                    continue
+            # Scan the raw bytes once per layout and decode only the matches
+            text_parts = [chunk.decode('latin-1') for chunk in _DOC_TEXT_RE.findall(content)]
+            text_parts.extend(chunk.decode('utf-16-le') for chunk in _DOC_UTF16_TEXT_RE.findall(content))
             
             if text_parts:
                 # Clean and join the extracted text
                 text = ' '.join(text_parts)
                 # Remove excessive whitespace
-                text = re.sub(r'\s+', ' ', text)
+                text = _WHITESPACE_RE.sub(' ', text)
                 return text.strip()
                 
         except Exception as e:
@@ -194,20 +326,41 @@ class DocumentProcessor:
             return f"Could not process .doc file: {e}"
     
     def extract_text_from_txt(self, txt_path):
-        """Read text files with proper encoding detection"""
-        encodings = ['utf-8', 'utf-16', 'latin-1', 'cp1252', 'iso-8859-1', 'windows-1256']
+        """Read text files with proper encoding detection (one read, one decode)"""
+        try:
+            stat = os.stat(txt_path)
+            file_key = (stat.st_mtime_ns, stat.st_size)
+            cached = self._txt_cache.get(txt_path)
+            if cached and cached[0] == file_key:
+                return cached[1]
+            
+            with open(txt_path, 'rb') as file:
+                raw = file.read()
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return ""
         
-        for encoding in encodings:
+        content = self._decode_text(raw).strip()
+        self._txt_cache[txt_path] = (file_key, content)
+        return content
+    
+    def _decode_text(self, raw):
+        """Decode raw text bytes: UTF-8 / UTF-16 BOM fast path, then detection, then Latin-1"""
+        if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
             try:
-                with open(txt_path, 'r', encoding=encoding) as file:
-                    content = file.read().strip()
-                    if content:  # Only return if content is found
-                        return content
+                return raw.decode('utf-16')
             except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                print(f"Error reading file with {encoding}: {e}")
-                continue
+                pass
         
-        print(f"Could not read {txt_path} with any encoding")
-        return ""
+        try:
+            return raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            pass
+        
+        if from_bytes is not None:
+            best = from_bytes(raw).best()
+            if best is not None:
+                return str(best)
+        
+        # Latin-1 decodes any byte sequence
+        return raw.decode('latin-1')
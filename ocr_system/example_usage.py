@@ -8,7 +8,9 @@ import sys
 from pathlib import Path
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+_parent_dir = str(Path(__file__).parent)
+if _parent_dir not in sys.path:
+    sys.path.insert(0, _parent_dir)
 
 from ocr_system.main_ocr import OCRSystem
 
@@ -1,42 +1,187 @@
 import os
+import re
+import stat
+import json
+import hashlib
 import argparse
+import threading
 from pathlib import Path
 from datetime import datetime
-from .document_processor import DocumentProcessor
-from .ocr_processor import OCRProcessor
+from functools import lru_cache, cached_property
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import xxhash
+except ImportError:  # xxhash is optional, BLAKE2b is the fallback
+    xxhash = None
+
+# Characters not allowed in output file names
+_SAFE_NAME_RE = re.compile(r'[^\w\-_\.]')
+
+# Metadata header lines at the top of every output file
+_HEADER_FIELDS = (
+    (b'Source File:', 'existing_source'),
+    (b'File Path:', 'file_path'),
+    (b'Extraction Date:', 'extraction_date'),
+)
+
+# Worker processes used by process_directory (files are extracted independently)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
 
 class OCRSystem:
-    def __init__(self, output_dir="./ocr_results"):
+    # Supported file extensions and the (processor, method) extracting their text
+    _EXTRACTORS = {
+        '.pdf': ('doc_processor', 'extract_text_from_pdf'),
+        '.docx': ('doc_processor', 'extract_text_from_docx'),
+        '.doc': ('doc_processor', 'extract_text_from_docx'),  # Try with .doc too
+        '.txt': ('doc_processor', 'extract_text_from_txt'),
+        '.png': ('ocr_processor', 'extract_text_from_image'),
+        '.jpg': ('ocr_processor', 'extract_text_from_image'),
+        '.jpeg': ('ocr_processor', 'extract_text_from_image'),
+        '.tiff': ('ocr_processor', 'extract_text_from_image'),
+        '.tif': ('ocr_processor', 'extract_text_from_image'),
+        '.bmp': ('ocr_processor', 'extract_text_from_image'),
+        '.gif': ('ocr_processor', 'extract_text_from_image'),
+    }
+    # Membership tests in directory scans
+    _EXT_SET = frozenset(_EXTRACTORS)
+    
+    def __init__(self, output_dir="./ocr_results", force_ocr=False):
         self.output_dir = Path(output_dir).resolve()
-        self.doc_processor = DocumentProcessor()
-        self.ocr_processor = OCRProcessor()
         
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
         
-        # Supported file extensions and their processors
-        self.supported_extensions = {
-            '.pdf': self.doc_processor.extract_text_from_pdf,
-            '.docx': self.doc_processor.extract_text_from_docx,
-            '.doc': self.doc_processor.extract_text_from_docx,  # Try with .doc too
-            '.txt': self.doc_processor.extract_text_from_txt,
-            '.png': self.ocr_processor.extract_text_from_image,
-            '.jpg': self.ocr_processor.extract_text_from_image,
-            '.jpeg': self.ocr_processor.extract_text_from_image,
-            '.tiff': self.ocr_processor.extract_text_from_image,
-            '.tif': self.ocr_processor.extract_text_from_image,
-            '.bmp': self.ocr_processor.extract_text_from_image,
-            '.gif': self.ocr_processor.extract_text_from_image,
+        # Content fingerprint -> output file name of everything extracted so far, so
+        # renamed or duplicated inputs are not extracted again
+        self.manifest_path = self.output_dir / "manifest.json"
+        self._manifest_lock = threading.Lock()
+        self._manifest = {}
+        self._fingerprints_by_output = {}
+        # Records not written yet, applied again on top of what other processes wrote
+        self._pending = {}
+        self._manifest_stamp = False  # (mtime, size) of the loaded manifest, None if there is none
+        with self._manifest_lock:
+            self._refresh_manifest()
+        
+        # Output file name -> parsed metadata header, built once per directory scan
+        self._output_index = None
+        
+        self.force_ocr = force_ocr
+    
+    # Processors are created (and their PDF/DOCX, OpenCV and Tesseract libraries imported)
+    # on first use, so --list, --clean and --check-conflicts never load them
+    @cached_property
+    def doc_processor(self):
+        from .document_processor import DocumentProcessor
+        return DocumentProcessor()
+    
+    @cached_property
+    def ocr_processor(self):
+        from .ocr_processor import OCRProcessor
+        return OCRProcessor()
+    
+    @cached_property
+    def supported_extensions(self):
+        """Supported file extensions and their extractor methods"""
+        extractors = {
+            extension: getattr(getattr(self, processor), method)
+            for extension, (processor, method) in self._EXTRACTORS.items()
         }
+        if self.force_ocr:
+            # OCR every page even if the PDF has a text layer
+            extractors['.pdf'] = self.doc_processor.ocr_pdf_pages
+        return extractors
     
-    def generate_output_filename(self, input_path):
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if isinstance(manifest, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _refresh_manifest(self):
+        """Reload the manifest if another process (the CLI, another backend worker) rewrote it;
+        the caller holds _manifest_lock"""
+        stamp = self._stamp(self.manifest_path)
+        if stamp == self._manifest_stamp:
+            return
+        self._manifest = self._load_manifest()
+        self._manifest_stamp = stamp
+        self._fingerprints_by_output = {name: fp for fp, name in self._manifest.items()}
+        for fingerprint, name in self._pending.items():
+            self._apply(fingerprint, name)
+    
+    def save_manifest(self):
+        """Merge the records of this process into the manifest on disk and write it atomically"""
+        with self._manifest_lock:
+            self._refresh_manifest()
+            tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, indent=2)
+            stamp = self._stamp(tmp_path)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_stamp = stamp
+            self._pending.clear()
+    
+    @staticmethod
+    def fingerprint(file_path):
+        """Hash of a file's content (xxh3 if available, else BLAKE2b), read in 1 MiB chunks"""
+        digest = xxhash.xxh3_128() if xxhash else hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return f"{digest.name}:{digest.hexdigest()}"
+    
+    def processed_output(self, fingerprint):
+        """Existing output file of already extracted content, or None"""
+        with self._manifest_lock:
+            self._refresh_manifest()
+            name = self._manifest.get(fingerprint)
+        if name and (self.output_dir / name).exists():
+            return self.output_dir / name
+        return None
+    
+    def _apply(self, fingerprint, name):
+        # Drop what this output file and this content were mapped to before
+        self._manifest.pop(self._fingerprints_by_output.pop(name, None), None)
+        self._fingerprints_by_output.pop(self._manifest.pop(fingerprint, None), None)
+        self._manifest[fingerprint] = name
+        self._fingerprints_by_output[name] = fingerprint
+    
+    def _record(self, fingerprint, output_file, flush=True):
+        """Remember which output file holds the text of this content"""
+        with self._manifest_lock:
+            self._apply(fingerprint, output_file.name)
+            self._pending.pop(fingerprint, None)
+            self._pending[fingerprint] = output_file.name
+        if flush:
+            self.save_manifest()
+    
+    def _source_changed(self, output_file, fingerprint):
+        """True if output_file was extracted from different content than fingerprint"""
+        with self._manifest_lock:
+            self._refresh_manifest()
+            recorded = self._fingerprints_by_output.get(output_file.name)
+        return fingerprint is not None and recorded is not None and recorded != fingerprint
+    
+    def generate_output_filename(self, input_path, fingerprint=None):
         """Generate output filename and handle naming conflicts"""
         input_path = Path(input_path)
         base_name = input_path.stem
         
         # Clean filename for safe storage
-        import re
-        safe_name = re.sub(r'[^\w\-_\.]', '_', base_name)
+        safe_name = _SAFE_NAME_RE.sub('_', base_name)
         
         output_file = self.output_dir / f"{safe_name}.txt"
         
@@ -44,7 +189,10 @@ class OCRSystem:
         if output_file.exists():
             conflict_info = self._check_naming_conflict(output_file, input_path)
             
-            if conflict_info['is_same_source']:
+            if conflict_info['is_same_source'] and self._source_changed(output_file, fingerprint):
+                # Same source file, but its content changed since it was extracted
+                print(f"🔄 Source changed since '{safe_name}.txt' was extracted, replacing it")
+            elif conflict_info['is_same_source']:
                 # Same source file already processed
                 print(f"⚠️  WARNING: File '{safe_name}.txt' already exists from the same source")
                 print(f"   Source: {input_path.name}")
@@ -81,17 +229,10 @@ class OCRSystem:
         }
         
         try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                content = f.read(1000)  # Read first 1000 characters for metadata
-                
-            lines = content.split('\n')
-            for line in lines:
-                if line.startswith("Source File:"):
-                    conflict_info['existing_source'] = line.split(":", 1)[1].strip()
-                elif line.startswith("File Path:"):
-                    conflict_info['file_path'] = line.split(":", 1)[1].strip()
-                elif line.startswith("Extraction Date:"):
-                    conflict_info['extraction_date'] = line.split(":", 1)[1].strip()
+            header = self._output_index.get(output_file.name) if self._output_index is not None else None
+            if header is None:
+                header = self._read_header(output_file)
+            conflict_info.update(header)
             
             # Check if it's the same source file
             if conflict_info['existing_source'] == input_path.name:
@@ -109,66 +250,158 @@ class OCRSystem:
         
         return conflict_info
     
-    def process_single_file(self, file_path):
-        """Process a single file and extract text"""
-        file_path = Path(file_path).resolve()
+    @staticmethod
+    def _read_header(output_file):
+        """Parse the metadata header of an extracted text file"""
+        header = {
+            'existing_source': None,
+            'extraction_date': None,
+            'file_path': None
+        }
         
-        if not file_path.exists():
-            print(f"Error: File {file_path} does not exist")
-            return False
+        # Raw bytes of the first 1 KiB: the header is ASCII keywords, only values are decoded
+        fd = os.open(output_file, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            content = os.read(fd, 1024)
+        finally:
+            os.close(fd)
+        
+        found = 0
+        for line in content.split(b'\n', len(_HEADER_FIELDS) + 2)[:len(_HEADER_FIELDS) + 2]:
+            for prefix, key in _HEADER_FIELDS:
+                if line.startswith(prefix):
+                    header[key] = line[len(prefix):].strip().decode('utf-8', 'replace')
+                    found += 1
+                    break
+            if found == len(_HEADER_FIELDS):
+                break
+        
+        return header
+    
+    def _build_output_index(self):
+        """Read every output header once so conflict checks are dictionary lookups"""
+        self._output_index = {}
+        output_files = self._output_entries()
+        for output_file in output_files:
+            try:
+                self._output_index[output_file.name] = self._read_header(output_file.path)
+            except Exception:
+                pass  # read (and reported) again on lookup
+        return output_files
+    
+    def extract_text(self, file_path, size=None, resolved=False):
+        """Extract text from a single file, returning None if no significant text was found"""
+        # Paths from a directory scan are already absolute (the root was resolved once)
+        file_path = Path(file_path) if resolved else Path(file_path).resolve()
+        
+        # size comes from the directory scan when there is one, otherwise one stat here
+        if size is None:
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                print(f"Error: File {file_path} does not exist")
+                return None
         
         extension = file_path.suffix.lower()
         
-        if extension not in self.supported_extensions:
+        if extension not in self._EXT_SET:
             print(f"Unsupported file type: {extension}")
-            print(f"Supported types: {list(self.supported_extensions.keys())}")
-            return False
+            print(f"Supported types: {list(self._EXTRACTORS)}")
+            return None
         
         print(f"\n{'='*60}")
         print(f"Processing: {file_path.name}")
         print(f"Type: {extension.upper()} file")
-        print(f"Size: {file_path.stat().st_size / 1024:.1f} KB")
+        print(f"Size: {size / 1024:.1f} KB")
         print(f"{'='*60}")
         
-        try:
-            # Extract text using appropriate method
-            extractor = self.supported_extensions[extension]
-            text = extractor(str(file_path))
+        # Extract text using appropriate method
+        extractor = self.supported_extensions[extension]
+        text = extractor(str(file_path))
+        
+        if text and len(text.strip()) > 10:
+            return text
+        
+        print(f"✗ FAILED: No significant text found")
+        print(f"  Extracted text length: {len(text.strip()) if text else 0} characters")
+        return None
+    
+    def save_extracted_text(self, file_path, text, fingerprint=None, flush=True, resolved=False, output_file=None):
+        """Save extracted text with its metadata header, returning (output_file, content) or None if already processed"""
+        file_path = Path(file_path) if resolved else Path(file_path).resolve()
+        if fingerprint is None:
+            fingerprint = self.fingerprint(file_path)
+        
+        # Generate output filename and check for conflicts, unless the batch analysis already did
+        if output_file is None:
+            output_file = self.generate_output_filename(file_path, fingerprint)
             
-            if text and len(text.strip()) > 10:
-                # Generate output filename and check for conflicts
-                output_file = self.generate_output_filename(file_path)
-                
-                if output_file is None:
-                    # File already exists from same source, skip processing
-                    print(f"⏭️  SKIPPED: File already processed")
-                    return True  # Return True as this is not an error
-                
-                # Save extracted text
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(f"Source File: {file_path.name}\n")
-                    f.write(f"File Path: {file_path}\n")
-                    f.write(f"Extraction Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"File Type: {extension.upper()}\n")
-                    f.write(f"Text Length: {len(text)} characters\n")
-                    f.write("=" * 80 + "\n\n")
-                    f.write(text)
-                
-                print(f"✓ SUCCESS: Text extracted and saved")
-                print(f"  Output file: {output_file.name}")
-                print(f"  Text length: {len(text):,} characters")
-                print(f"  Lines: {len(text.splitlines()):,}")
+            if output_file is None:
+                # File already exists from same source
+                return None
+        
+        extraction_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        content = (
+            f"Source File: {file_path.name}\n"
+            f"File Path: {file_path}\n"
+            f"Extraction Date: {extraction_date}\n"
+            f"File Type: {file_path.suffix.upper()}\n"
+            f"Text Length: {len(text)} characters\n"
+            + "=" * 80 + "\n\n"
+            + text
+        )
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self._record(fingerprint, output_file, flush=flush)
+        if self._output_index is not None:
+            self._output_index[output_file.name] = {
+                'existing_source': file_path.name,
+                'extraction_date': extraction_date,
+                'file_path': str(file_path)
+            }
+        
+        return output_file, content
+    
+    def process_single_file(self, file_path, size=None):
+        """Process a single file and extract text"""
+        try:
+            # Identical content (even under another name) is not extracted again
+            file_path = Path(file_path).resolve()
+            fingerprint = self.fingerprint(file_path) if file_path.is_file() else None
+            processed = self.processed_output(fingerprint)
+            if processed is not None:
+                print(f"⏭️  SKIPPED: {file_path.name} already extracted to {processed.name} (same content)")
                 return True
-            else:
-                print(f"✗ FAILED: No significant text found")
-                print(f"  Extracted text length: {len(text.strip()) if text else 0} characters")
-                return False
-                
+            
+            return self._save_and_report(
+                file_path, self.extract_text(file_path, size, resolved=True), fingerprint, resolved=True
+            )
         except Exception as e:
             print(f"✗ ERROR: Failed to process file")
             print(f"  Error details: {str(e)}")
             return False
     
+    def _save_and_report(self, file_path, text, fingerprint=None, flush=True, resolved=False, output_file=None):
+        """Save text extracted from a file and print the outcome"""
+        if text is None:
+            return False
+        
+        saved = self.save_extracted_text(
+            file_path, text, fingerprint, flush=flush, resolved=resolved, output_file=output_file
+        )
+        
+        if saved is None:
+            # File already exists from same source, skip processing
+            print(f"⏭️  SKIPPED: File already processed")
+            return True  # Return True as this is not an error
+        
+        output_file, _ = saved
+        print(f"✓ SUCCESS: Text extracted and saved")
+        print(f"  Output file: {output_file.name}")
+        print(f"  Text length: {len(text):,} characters")
+        print(f"  Lines: {len(text.splitlines()):,}")
+        return True
+    
     def process_directory(self, directory_path):
         """Process all supported files in a directory"""
         directory_path = Path(directory_path).resolve()
@@ -181,23 +414,26 @@ class OCRSystem:
         print(f"SCANNING DIRECTORY: {directory_path}")
         print(f"{'='*80}")
         
-        # Find all supported files
-        all_files = []
-        for file_path in directory_path.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                all_files.append(file_path)
+        # Find all supported files, keeping the stat results of the scan
+        file_stats = dict(self._iter_supported(directory_path))
+        all_files = list(file_stats)
         
         if not all_files:
             print(f"No supported files found in {directory_path}")
-            print(f"Supported extensions: {list(self.supported_extensions.keys())}")
+            print(f"Supported extensions: {list(self._EXTRACTORS)}")
             return
         
+        # File listings are written with one print, not one per line
         print(f"Found {len(all_files)} supported files:")
-        for i, file_path in enumerate(all_files, 1):
-            print(f"  {i:2d}. {file_path.name} ({file_path.suffix.upper()})")
-        
-        # Pre-scan for naming conflicts
-        conflicts_summary = self._analyze_directory_conflicts(all_files)
+        print("\n".join(
+            f"  {i:2d}. {file_path.name} ({file_path.suffix.upper()})"
+            for i, file_path in enumerate(all_files, 1)
+        ))
+        
+        # Pre-scan for already extracted content and naming conflicts
+        self._build_output_index()
+        fingerprints = {file_path: self.fingerprint(file_path) for file_path in all_files}
+        conflicts_summary = self._analyze_directory_conflicts(all_files, fingerprints)
         if conflicts_summary['skipped_files']:
             print(f"\n📋 CONFLICT ANALYSIS:")
             print(f"Files to skip (already processed): {len(conflicts_summary['skipped_files'])}")
@@ -212,21 +448,48 @@ class OCRSystem:
         failed_count = 0
         skipped_count = 0
         
-        # Process each file
-        for i, file_path in enumerate(all_files, 1):
-            print(f"\n[{i}/{len(all_files)}] ", end="")
-            
-            # Check if this file should be skipped
-            if file_path in conflicts_summary['skipped_files']:
-                print(f"⏭️  SKIPPING: {file_path.name} (already processed)")
-                skipped_count += 1
-                continue
-            
-            result = self.process_single_file(file_path)
-            if result:
-                processed_count += 1
-            else:
-                failed_count += 1
+        # Skipped files are never submitted to the workers
+        skipped_files = set(conflicts_summary['skipped_files'])
+        to_process = [file_path for file_path in all_files if file_path not in skipped_files]
+        for file_path in conflicts_summary['skipped_files']:
+            print(f"⏭️  SKIPPING: {file_path.name} (already processed)")
+            skipped_count += 1
+        
+        # Extract in parallel worker processes; naming and writing stay in this
+        # process, in directory order, so alternative names cannot race
+        if to_process:
+            workers = min(OCR_WORKERS, len(to_process))
+            print(f"\nExtracting {len(to_process)} files with {workers} worker process(es)...")
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=init_file_worker, initargs=(workers,)) as pool:
+                    texts = pool.map(
+                        _process_one, to_process, repeat(str(self.output_dir)), repeat(self.force_ocr),
+                        [file_stats[file_path].st_size for file_path in to_process]
+                    )
+                    for i, (file_path, text) in enumerate(zip(to_process, texts), 1):
+                        print(f"\n[{i}/{len(to_process)}] {file_path.name}: ", end="")
+                        if text is None:
+                            print(f"✗ FAILED: No text extracted (see worker output above)")
+                            failed_count += 1
+                            continue
+                        
+                        try:
+                            result = self._save_and_report(
+                                file_path, text, fingerprints[file_path], flush=False, resolved=True,
+                                output_file=conflicts_summary['resolved'][file_path]
+                            )
+                        except Exception as e:
+                            print(f"✗ ERROR: Failed to save extracted text")
+                            print(f"  Error details: {str(e)}")
+                            result = False
+                        
+                        if result:
+                            processed_count += 1
+                        else:
+                            failed_count += 1
+            finally:
+                # Manifest written once for the whole run
+                self.save_manifest()
         
         # Summary
         print(f"\n{'='*80}")
@@ -240,72 +503,131 @@ class OCRSystem:
         print(f"Output directory: {self.output_dir}")
         
         # List output files
-        output_files = list(self.output_dir.glob("*.txt"))
+        output_files = self._output_entries()
         if output_files:
             print(f"\nExtracted text files ({len(output_files)}):")
-            for output_file in sorted(output_files):
-                size = output_file.stat().st_size
-                print(f"  - {output_file.name} ({size:,} bytes)")
+            print("\n".join(
+                f"  - {output_file.name} ({output_file.stat().st_size:,} bytes)"
+                for output_file in output_files
+            ))
     
-    def _analyze_directory_conflicts(self, all_files):
+    def _output_entries(self):
+        """Extracted .txt files as scandir entries sorted by name (their stat needs no path lookup)"""
+        with os.scandir(self.output_dir) as it:
+            entries = [entry for entry in it if entry.name.endswith('.txt') and entry.is_file()]
+        return sorted(entries, key=lambda entry: entry.name)
+    
+    def _iter_supported(self, root):
+        """Yield (path, stat result) for supported files below root, skipping hidden directories"""
+        subdirs = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    # Extension filter on the name before any stat or Path object
+                    if os.path.splitext(entry.name)[1].lower() in self._EXT_SET and entry.is_file():
+                        yield Path(entry.path), entry.stat()
+                    elif entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                        subdirs.append(entry.path)
+        except OSError as e:
+            print(f"⚠️  WARNING: Could not scan {root}: {e}")
+        
+        for subdir in subdirs:
+            yield from self._iter_supported(subdir)
+    
+    def _analyze_directory_conflicts(self, all_files, fingerprints=None):
         """Analyze naming conflicts for a batch of files before processing"""
         conflicts = {
             'skipped_files': [],
-            'alternative_names': []
+            'alternative_names': [],
+            'resolved': {}  # file -> output file it will be saved to, None if skipped
         }
         
+        fingerprints = fingerprints or {}
+        seen = set()
+        # Output stems on disk, plus names this batch will create, so the loop never stats
+        existing = {entry.name[:-4] for entry in self._output_entries()}
+        planned = set()
         for file_path in all_files:
+            # Content already extracted, or a duplicate of an earlier file in this batch
+            fingerprint = fingerprints.get(file_path)
+            if fingerprint is not None:
+                if fingerprint in seen or self.processed_output(fingerprint) is not None:
+                    conflicts['skipped_files'].append(file_path)
+                    conflicts['resolved'][file_path] = None
+                    continue
+                seen.add(fingerprint)
+            
             # Generate the expected output filename
-            import re
             base_name = file_path.stem
-            safe_name = re.sub(r'[^\w\-_\.]', '_', base_name)
+            safe_name = _SAFE_NAME_RE.sub('_', base_name)
             expected_output = self.output_dir / f"{safe_name}.txt"
             
-            if expected_output.exists():
+            conflicts['resolved'][file_path] = expected_output
+            if safe_name not in existing:
+                existing.add(safe_name)
+                planned.add(safe_name)
+                continue
+            
+            if safe_name in planned:
+                # Taken by an earlier file of this batch
+                conflict_info = {'is_same_source': False}
+            else:
                 conflict_info = self._check_naming_conflict(expected_output, file_path)
-                
-                if conflict_info['is_same_source']:
-                    conflicts['skipped_files'].append(file_path)
-                else:
-                    # Will need alternative name
-                    counter = 1
-                    while (self.output_dir / f"{safe_name}_{counter}.txt").exists():
-                        counter += 1
-                    alt_name = f"{safe_name}_{counter}.txt"
-                    conflicts['alternative_names'].append((file_path.name, alt_name))
+            
+            if conflict_info['is_same_source'] and self._source_changed(expected_output, fingerprint):
+                pass  # changed since extracted: the output is replaced
+            elif conflict_info['is_same_source']:
+                conflicts['skipped_files'].append(file_path)
+                conflicts['resolved'][file_path] = None
+            else:
+                # Will need alternative name
+                counter = 1
+                while f"{safe_name}_{counter}" in existing:
+                    counter += 1
+                existing.add(f"{safe_name}_{counter}")
+                alt_name = f"{safe_name}_{counter}.txt"
+                conflicts['alternative_names'].append((file_path.name, alt_name))
+                conflicts['resolved'][file_path] = self.output_dir / alt_name
         
         return conflicts
     
     def list_existing_files(self):
         """List all existing extracted text files"""
-        output_files = list(self.output_dir.glob("*.txt"))
+        # One scan and header read per file; the index is kept for later conflict checks
+        output_files = self._build_output_index()
         
         if output_files:
             print(f"\nExisting extracted files ({len(output_files)}):")
-            for output_file in sorted(output_files):
+            lines = []
+            for output_file in output_files:
                 size = output_file.stat().st_size
-                try:
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        first_lines = f.read(200)
-                    source_file = "Unknown"
-                    for line in first_lines.split('\n'):
-                        if line.startswith("Source File:"):
-                            source_file = line.split(":", 1)[1].strip()
-                            break
-                    print(f"  - {output_file.name} ({size:,} bytes) <- {source_file}")
-                except:
-                    print(f"  - {output_file.name} ({size:,} bytes) <- [Error reading source]")
+                header = self._output_index.get(output_file.name)
+                if header is not None:
+                    source_file = header['existing_source'] or "Unknown"
+                    lines.append(f"  - {output_file.name} ({size:,} bytes) <- {source_file}")
+                else:
+                    lines.append(f"  - {output_file.name} ({size:,} bytes) <- [Error reading source]")
+            print("\n".join(lines))
         else:
             print(f"\nNo existing extracted files in {self.output_dir}")
     
     def clean_output_directory(self):
         """Clean all extracted text files"""
-        output_files = list(self.output_dir.glob("*.txt"))
+        output_files = self._output_entries()
+        
+        # The fingerprint manifest only describes those files
+        with self._manifest_lock:
+            self._manifest.clear()
+            self._fingerprints_by_output.clear()
+            self._pending.clear()
+            self.manifest_path.unlink(missing_ok=True)
+            self._manifest_stamp = None
+        self._output_index = None
         
         if output_files:
             print(f"Removing {len(output_files)} existing files...")
             for output_file in output_files:
-                output_file.unlink()
+                os.unlink(output_file.path)
             print("✓ Output directory cleaned")
         else:
             print("Output directory is already empty")
@@ -314,7 +636,10 @@ class OCRSystem:
         """Check for naming conflicts without processing files"""
         input_path = Path(input_path).resolve()
         
-        if not input_path.exists():
+        # One stat answers both "does it exist" and "is it a file"
+        try:
+            mode = input_path.stat().st_mode
+        except OSError:
             print(f"Error: Path {input_path} does not exist")
             return
         
@@ -323,13 +648,10 @@ class OCRSystem:
         print(f"{'='*80}")
         
         # Find all supported files
-        if input_path.is_file():
-            all_files = [input_path] if input_path.suffix.lower() in self.supported_extensions else []
+        if stat.S_ISREG(mode):
+            all_files = [input_path] if input_path.suffix.lower() in self._EXT_SET else []
         else:
-            all_files = []
-            for file_path in input_path.rglob('*'):
-                if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                    all_files.append(file_path)
+            all_files = [file_path for file_path, _ in self._iter_supported(input_path)]
         
         if not all_files:
             print(f"No supported files found")
@@ -337,7 +659,10 @@ class OCRSystem:
         
         print(f"Analyzing {len(all_files)} supported files...")
         
-        conflicts_summary = self._analyze_directory_conflicts(all_files)
+        if self._output_index is None:
+            self._build_output_index()
+        fingerprints = {file_path: self.fingerprint(file_path) for file_path in all_files}
+        conflicts_summary = self._analyze_directory_conflicts(all_files, fingerprints)
         
         print(f"\n📋 CONFLICT ANALYSIS RESULTS:")
         print(f"{'='*50}")
@@ -354,10 +679,9 @@ class OCRSystem:
                 print(f"\n🔄 Files that will be SKIPPED (already processed):")
                 for file_path in conflicts_summary['skipped_files']:
                     # Get details about existing file
-                    import re
-                    safe_name = re.sub(r'[^\w\-_\.]', '_', file_path.stem)
-                    existing_file = self.output_dir / f"{safe_name}.txt"
-                    conflict_info = self._check_naming_conflict(existing_file, file_path)
+                    safe_name = _SAFE_NAME_RE.sub('_', file_path.stem)
+                    existing_file = self.processed_output(fingerprints[file_path]) or self.output_dir / f"{safe_name}.txt"
+                    conflict_info = self._check_naming_conflict(existing_file, file_path) if existing_file.exists() else {'extraction_date': None}
                     
                     print(f"  - {file_path.name}")
                     print(f"    Reason: Already processed")
@@ -373,25 +697,47 @@ class OCRSystem:
         print(f"\nOutput directory: {self.output_dir}")
         
         # Show existing files for context
-        existing_files = list(self.output_dir.glob("*.txt"))
+        existing_files = self._output_entries()
         if existing_files:
             print(f"\nExisting extracted files ({len(existing_files)}):")
-            for output_file in sorted(existing_files)[:10]:  # Show max 10
-                try:
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        content = f.read(200)
-                    source_file = "Unknown"
-                    for line in content.split('\n'):
-                        if line.startswith("Source File:"):
-                            source_file = line.split(":", 1)[1].strip()
-                            break
-                    print(f"  - {output_file.name} <- {source_file}")
-                except:
+            for output_file in existing_files[:10]:  # Show max 10
+                # Headers were read into the output index by the conflict analysis above
+                header = self._output_index.get(output_file.name)
+                if header is not None:
+                    print(f"  - {output_file.name} <- {header['existing_source'] or 'Unknown'}")
+                else:
                     print(f"  - {output_file.name} <- [Error reading source]")
             
             if len(existing_files) > 10:
                 print(f"  ... and {len(existing_files) - 10} more files")
 
+def init_file_worker(file_workers, pids=None):
+    """Pool initializer for processes that each extract whole files: split the CPUs
+    between their per-page PDF OCR pools instead of giving every one of them all CPUs.
+    If given, the worker's PID is put on the pids queue so its owner can kill it."""
+    os.environ.setdefault("OCR_PAGE_WORKERS", str(max(1, (os.cpu_count() or 1) // file_workers)))
+    if pids is not None:
+        pids.put(os.getpid())
+
+@lru_cache(maxsize=None)
+def _get_ocr_system(output_dir, force_ocr=False):
+    # One OCRSystem per worker process, reused for every file it extracts
+    return OCRSystem(output_dir, force_ocr)
+
+def extract_text(file_path, output_dir="./ocr_results", force_ocr=False, size=None, resolved=False):
+    """Extract text from one file (module-level so it can be submitted to a process pool)"""
+    return _get_ocr_system(output_dir, force_ocr).extract_text(file_path, size, resolved)
+
+def _process_one(file_path, output_dir, force_ocr=False, size=None):
+    """Extract text in a process_directory worker, reporting errors instead of raising them"""
+    try:
+        # file_path comes from the scan of the resolved directory
+        return extract_text(file_path, output_dir, force_ocr, size, resolved=True)
+    except Exception as e:
+        print(f"✗ ERROR: Failed to process file {Path(file_path).name}")
+        print(f"  Error details: {str(e)}")
+        return None
+
 def main():
     parser = argparse.ArgumentParser(
         description='OCR System for RAG Document Processing (French/Arabic Support)',
@@ -401,6 +747,7 @@ Examples:
   python -m ocr_system.main_ocr document.pdf
   python -m ocr_system.main_ocr /path/to/documents/
   python -m ocr_system.main_ocr image.png --output ./custom_output/
+  python -m ocr_system.main_ocr scan.pdf --force-ocr
   python -m ocr_system.main_ocr --list
   python -m ocr_system.main_ocr --clean
         """
@@ -418,6 +765,12 @@ Examples:
                        help='Clean all extracted files from output directory')
     parser.add_argument('--check-conflicts', action='store_true',
                        help='Check for potential naming conflicts without processing')
+    parser.add_argument('--force-ocr', action='store_true',
+                       help='OCR PDFs even when they have a text layer')
+    parser.add_argument('--accurate', action='store_true',
+                       help='Use the slower LSTM + legacy Tesseract engine (--oem 3)')
+    parser.add_argument('--detect-script', action='store_true',
+                       help='Detect each image\'s script first and load only its language models')
     
     args = parser.parse_args()
     
@@ -426,8 +779,14 @@ Examples:
     print("Supports: PDF, DOCX, TXT, Images (PNG, JPG, TIFF, BMP)")
     print("Languages: French, Arabic, English")
     
+    # Read by every OCRProcessor, including those in worker processes
+    if args.accurate:
+        os.environ["OCR_FAST"] = "0"
+    if args.detect_script:
+        os.environ["OCR_DETECT_SCRIPT"] = "1"
+    
     # Initialize OCR system
-    ocr_system = OCRSystem(args.output)
+    ocr_system = OCRSystem(args.output, force_ocr=args.force_ocr)
     
     # Handle utility commands
     if args.list:
@@ -453,10 +812,14 @@ Examples:
     
     # Process input
     input_path = Path(args.input).resolve()
+    try:
+        mode = input_path.stat().st_mode
+    except OSError:
+        mode = 0
     
-    if input_path.is_file():
+    if stat.S_ISREG(mode):
         ocr_system.process_single_file(input_path)
-    elif input_path.is_dir():
+    elif stat.S_ISDIR(mode):
         ocr_system.process_directory(input_path)
     else:
         print(f"Error: {input_path} is not a valid file or directory")
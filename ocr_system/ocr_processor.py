@@ -3,41 +3,108 @@ from PIL import Image
 import cv2
 import numpy as np
 import os
+import re
+import threading
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr is optional, pytesseract runs the tesseract CLI instead
+    tesserocr = None
+
+_SPACES_RE = re.compile(r' {2,}')
+
+# Tesseract models to load per script found by orientation and script detection
+_SCRIPT_LANGUAGES = {'Arabic': 'ara', 'Latin': 'fra+eng'}
+
+# tesserocr engines, kept loaded per thread instead of a tesseract process per image
+_tesserocr_local = threading.local()
+
+def _tesserocr_api(languages, oem):
+    apis = _tesserocr_local.__dict__.setdefault('apis', {})
+    if (languages, oem) not in apis:
+        apis[(languages, oem)] = tesserocr.PyTessBaseAPI(
+            lang=languages,
+            psm=tesserocr.PSM.SINGLE_BLOCK,  # --psm 6
+            oem=tesserocr.OEM.LSTM_ONLY if oem == 1 else tesserocr.OEM.DEFAULT
+        )
+    return apis[(languages, oem)]
 
 class OCRProcessor:
-    def __init__(self):
-        # Configure for French and Arabic languages
-        self.languages = 'fra+ara+eng'
+    def __init__(self, fast=None, languages=None, detect_script=None):
+        # Defaults come from the environment so worker processes pick up CLI choices
+        if fast is None:
+            fast = os.getenv("OCR_FAST", "1") != "0"
+        if detect_script is None:
+            detect_script = os.getenv("OCR_DETECT_SCRIPT", "0") == "1"
         
+        # Configure for French and Arabic languages
+        self.languages = languages or os.getenv("OCR_LANGUAGES", 'fra+ara+eng')
+        # LSTM engine only (fast) or LSTM + legacy engine (slower, sometimes more accurate)
+        self.oem = 1 if fast else 3
+        self.detect_script = detect_script
+    
+    @property
+    def config_tag(self):
+        """Identifies the OCR settings, for caches of OCR output"""
+        return f"oem{self.oem}:{self.languages}:osd{int(self.detect_script)}"
+    
+    def _image_to_string(self, image):
+        """OCR a numpy or PIL image with the configured engine and languages"""
+        languages = self._languages_for(image)
+        if tesserocr is not None:
+            try:
+                api = _tesserocr_api(languages, self.oem)
+                api.SetImage(image if isinstance(image, Image.Image) else Image.fromarray(image))
+                return api.GetUTF8Text()
+            except RuntimeError as e:
+                print(f"tesserocr failed, falling back to pytesseract: {e}")
+        return pytesseract.image_to_string(image, config=f'--oem {self.oem} --psm 6 -l {languages}')
+    
+    def _languages_for(self, image):
+        languages = self.languages
+        if self.detect_script:
+            # Load only the detected script's models instead of all of them
+            try:
+                osd = pytesseract.image_to_osd(image, config='--psm 0')
+                script = re.search(r'Script: (\w+)', osd)
+                languages = _SCRIPT_LANGUAGES.get(script.group(1), languages) if script else languages
+            except Exception:
+                pass  # too little text to detect: keep all languages
+        return languages
+    
     def preprocess_image(self, image_path):
         """Preprocess image for better OCR accuracy"""
         try:
-            img = cv2.imread(image_path)
+            # Decode straight to grayscale: no BGR buffer and no color conversion pass
+            gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
             
-            if img is None:
+            if gray is None:
                 # Try with PIL if OpenCV fails
-                pil_img = Image.open(image_path)
-                img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Remove noise
-            denoised = cv2.medianBlur(gray, 3)
+                gray = np.array(Image.open(image_path).convert('L'))
             
-            # Apply threshold to get image with only black and white
-            thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-            
-            # Morphological operations to remove noise
-            kernel = np.ones((1,1), np.uint8)
-            # Use the numerical value for MORPH_OPENING for compatibility
-            opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-            
-            return opening
+            return self._binarize(gray)
         except Exception as e:
             print(f"Error preprocessing image: {e}")
             return None
     
+    def preprocess_pil_image(self, pil_img):
+        """Preprocess an in-memory PIL image (e.g. a rendered PDF page)"""
+        try:
+            return self._binarize(np.array(pil_img.convert('L')))
+        except Exception as e:
+            print(f"Error preprocessing image: {e}")
+            return None
+    
+    def _binarize(self, gray):
+        # Remove noise
+        denoised = cv2.medianBlur(gray, 3)
+        
+        # Threshold to an image with only black and white, in place (opening with the
+        # former 1x1 kernel was an identity operation, so there is no morphology step)
+        cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU, dst=denoised)
+        
+        return denoised
+    
     def extract_text_from_image(self, image_path):
         """Extract text from image file with French/Arabic support"""
         try:
@@ -45,13 +112,10 @@ class OCRProcessor:
             processed_img = self.preprocess_image(image_path)
             
             if processed_img is not None:
-                # OCR configuration for better accuracy
-                custom_config = f'--oem 3 --psm 6 -l {self.languages}'
-                text = pytesseract.image_to_string(processed_img, config=custom_config)
+                text = self._image_to_string(processed_img)
             else:
                 # Fallback to direct OCR without preprocessing
-                custom_config = f'--oem 3 --psm 6 -l {self.languages}'
-                text = pytesseract.image_to_string(Image.open(image_path), config=custom_config)
+                text = self._image_to_string(Image.open(image_path))
             
             # Clean up the text
             cleaned_text = self.clean_extracted_text(text)
@@ -61,19 +125,28 @@ class OCRProcessor:
             print(f"Error processing image {image_path}: {e}")
             return ""
     
+    def extract_text_from_pil(self, pil_img):
+        """Extract text from an in-memory PIL image, without an image file round-trip"""
+        try:
+            processed_img = self.preprocess_pil_image(pil_img)
+            image = processed_img if processed_img is not None else pil_img
+            
+            text = self._image_to_string(image)
+            
+            return self.clean_extracted_text(text)
+            
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            return ""
+    
     def clean_extracted_text(self, text):
         """Clean and format extracted text"""
         if not text:
             return ""
         
-        # Remove excessive whitespace and empty lines
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        # Join lines with proper spacing
-        cleaned_text = '\n'.join(lines)
-        
-        # Remove multiple consecutive spaces
-        import re
-        cleaned_text = re.sub(r' +', ' ', cleaned_text)
-        
-        return cleaned_text.strip()
+        # Strip lines, drop empty ones and collapse runs of spaces in one pass
+        return '\n'.join(
+            _SPACES_RE.sub(' ', stripped)
+            for line in text.splitlines()
+            if (stripped := line.strip())
+        )
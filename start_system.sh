@@ -81,6 +81,10 @@ if check_port 3000; then
     fi
 fi
 
+# Ollama concurrency: serve several chat requests in parallel instead of queueing them
+export OLLAMA_NUM_PARALLEL=${OLLAMA_NUM_PARALLEL:-4}
+export OLLAMA_MAX_LOADED_MODELS=${OLLAMA_MAX_LOADED_MODELS:-2}
+
 # Start Ollama in background if not running
 echo -e "${BLUE}Checking Ollama service...${NC}"
 if ! pgrep -x "ollama" > /dev/null; then
@@ -96,9 +100,10 @@ ollama list | grep -q "llama3" || {
     ollama pull llama3
 }
 
-ollama list | grep -q "mxbai-embed-large" || {
-    echo -e "${YELLOW}Pulling mxbai-embed-large model...${NC}"
-    ollama pull mxbai-embed-large
+EMBEDDING_MODEL=${EMBEDDING_MODEL:-mxbai-embed-large}
+ollama list | grep -q "$EMBEDDING_MODEL" || {
+    echo -e "${YELLOW}Pulling $EMBEDDING_MODEL model...${NC}"
+    ollama pull "$EMBEDDING_MODEL"
 }
 
 # Start backend
@@ -6,16 +6,19 @@ Tests text extraction from various file formats and validates output
 
 import os
 import sys
-import tempfile
 import shutil
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Add the parent directory to sys.path to import ocr_system
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_parent_dir = str(Path(__file__).parent.parent)
+if _parent_dir not in sys.path:
+    sys.path.insert(0, _parent_dir)
 
 try:
+    from ocr_system import main_ocr
     from ocr_system.main_ocr import OCRSystem
     from ocr_system.ocr_processor import OCRProcessor
     from ocr_system.document_processor import DocumentProcessor
@@ -24,11 +27,22 @@ except ImportError as e:
     print("Make sure you're running this from the project root directory")
     sys.exit(1)
 
+DEJAVU_SANS = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+# Line between the metadata header and the text in every output file
+HEADER_SEPARATOR = b"=" * 80
+
+@lru_cache(maxsize=8)
+def _get_font(path, size):
+    """Parse a TrueType font once per (path, size)"""
+    return ImageFont.truetype(path, size)
+
 class OCRTester:
     def __init__(self):
         self.test_dir = Path("test_ocr_files")
         self.output_dir = Path("test_ocr_output")
         self.results = []
+        self.ocr_system = None
         
     def setup_test_environment(self):
         """Create test directories"""
@@ -43,6 +57,9 @@ class OCRTester:
         self.test_dir.mkdir(exist_ok=True)
         self.output_dir.mkdir(exist_ok=True)
         
+        # One system (and its lazily created processors) shared by every test
+        self.ocr_system = OCRSystem(str(self.output_dir))
+        
         print(f"Test files directory: {self.test_dir}")
         print(f"Test output directory: {self.output_dir}")
     
@@ -75,8 +92,7 @@ Mixed Content:
 """
         
         file_path = self.test_dir / "test_document.txt"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(test_text)
+        file_path.write_bytes(test_text.encode('utf-8'))
         
         return file_path, test_text
     
@@ -89,8 +105,8 @@ Mixed Content:
             
             # Try to use a default font, fallback to basic if not available
             try:
-                font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
-                font_medium = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
+                font_large = _get_font(DEJAVU_SANS, 24)
+                font_medium = _get_font(DEJAVU_SANS, 18)
             except:
                 try:
                     font_large = ImageFont.load_default()
@@ -120,7 +136,7 @@ Mixed Content:
             
             # Save image
             file_path = self.test_dir / "test_image.png"
-            img.save(file_path, "PNG")
+            img.save(file_path, "PNG", optimize=False, compress_level=1)  # thrown away after the test
             
             return file_path, "\n".join(texts)
             
@@ -204,32 +220,28 @@ Mixed Content:
         print("TESTING OCR SYSTEM - SINGLE FILES")
         print("="*60)
         
-        ocr_system = OCRSystem(str(self.output_dir))
+        ocr_system = self.ocr_system
         
-        # Test 1: Text file
-        print("\n1. Testing text file processing...")
-        text_file, expected_text = self.create_test_text_file()
-        success = ocr_system.process_single_file(text_file)
-        self.results.append(("Text file processing", success))
+        # (test name, fixture factory, result if the fixture could not be created)
+        tests = [
+            ("Text file processing", self.create_test_text_file, False),
+            ("Image file processing", self.create_test_image, False),
+            ("PDF file processing", self.create_test_pdf_with_text, None),  # reportlab is optional
+        ]
         
-        # Test 2: Image file
-        print("\n2. Testing image file processing...")
-        image_file, expected_image_text = self.create_test_image()
-        if image_file:
-            success = ocr_system.process_single_file(image_file)
-            self.results.append(("Image file processing", success))
-        else:
-            self.results.append(("Image file processing", False))
-        
-        # Test 3: PDF file (if possible)
-        print("\n3. Testing PDF file processing...")
-        pdf_file, expected_pdf_text = self.create_test_pdf_with_text()
-        if pdf_file:
-            success = ocr_system.process_single_file(pdf_file)
-            self.results.append(("PDF file processing", success))
-        else:
-            print("   Skipping PDF test (reportlab not available)")
-            self.results.append(("PDF file processing", None))
+        # The fixtures are independent, so they are created concurrently; processing stays
+        # serial so each file's report is readable and PDF page pools never fork beside threads
+        with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+            test_files = list(pool.map(lambda test: test[1]()[0], tests))
+        
+        for i, ((test_name, _, missing_result), file_path) in enumerate(zip(tests, test_files), 1):
+            print(f"\n{i}. Testing {test_name.lower()}...")
+            if file_path:
+                self.results.append((test_name, ocr_system.process_single_file(file_path)))
+            else:
+                if missing_result is None:
+                    print(f"   Skipping {test_name} test (fixture not available)")
+                self.results.append((test_name, missing_result))
     
     def test_ocr_system_directory(self):
         """Test OCR system with directory processing"""
@@ -237,7 +249,7 @@ Mixed Content:
         print("TESTING OCR SYSTEM - DIRECTORY PROCESSING")
         print("="*60)
         
-        ocr_system = OCRSystem(str(self.output_dir))
+        ocr_system = self.ocr_system
         
         # Process the entire test directory
         print(f"\nProcessing directory: {self.test_dir}")
@@ -267,20 +279,26 @@ Mixed Content:
             print(f"\nValidating: {output_file.name}")
             
             try:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                # The header and the start of the text fit in the first 4 KiB; the rest is never read
+                size = output_file.stat().st_size
+                with open(output_file, 'rb') as f:
+                    head = f.read(4096)
                 
                 # Basic validations
-                has_header = "Source File:" in content and "Extraction Date:" in content
-                has_content = len(content.split("="*80)[-1].strip()) > 10
+                has_header = b"Source File:" in head and b"Extraction Date:" in head
+                separator = head.find(HEADER_SEPARATOR)
+                content_part = (
+                    head[separator + len(HEADER_SEPARATOR):].decode('utf-8', 'ignore').strip()
+                    if separator >= 0 else ""
+                )
+                has_content = len(content_part) > 10
                 
                 print(f"  Header present: {'✓' if has_header else '✗'}")
-                print(f"  Content length: {len(content)} characters")
+                print(f"  Content length: {size} bytes")
                 print(f"  Has meaningful content: {'✓' if has_content else '✗'}")
                 
                 # Show a preview of extracted content
-                content_part = content.split("="*80)[-1].strip()
-                preview = content_part[:200] + "..." if len(content_part) > 200 else content_part
+                preview = content_part[:200] + "..." if len(content_part) > 200 or size > len(head) else content_part
                 print(f"  Content preview: {repr(preview)}")
                 
                 self.results.append((f"Output validation - {output_file.name}", has_header and has_content))
@@ -303,16 +321,20 @@ Mixed Content:
             return
         
         # Find all supported files in dataset
-        ocr_system = OCRSystem(str(self.output_dir))
-        all_files = []
-        for file_path in dataset_dir.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in ocr_system.supported_extensions:
-                all_files.append(file_path)
+        ocr_system = self.ocr_system
+        # Filter on the name from the directory listing; Path objects only for matches
+        extensions = OCRSystem._EXT_SET
+        all_files = [
+            Path(root, name)
+            for root, _, names in os.walk(dataset_dir)
+            for name in names
+            if os.path.splitext(name)[1].lower() in extensions
+        ]
         
         if not all_files:
             print(f"No supported files found in {dataset_dir}")
             print("Add some documents to the dataset folder and run the test again.")
-            print(f"Supported extensions: {list(ocr_system.supported_extensions.keys())}")
+            print(f"Supported extensions: {list(OCRSystem._EXTRACTORS)}")
             self.results.append(("Dataset folder processing", None))
             return
         
@@ -327,7 +349,8 @@ Mixed Content:
         
         # Check results
         output_files = list(self.output_dir.glob("*.txt"))
-        dataset_output_files = [f for f in output_files if f.stem in [file.stem for file in all_files]]
+        expected_stems = frozenset(file.stem for file in all_files)
+        dataset_output_files = [f for f in output_files if f.stem in expected_stems]
         
         success = len(dataset_output_files) > 0
         success_rate = len(dataset_output_files) / len(all_files) * 100 if all_files else 0
@@ -348,23 +371,23 @@ Mixed Content:
         test_file, _ = self.create_test_text_file()
         
         try:
-            # Run the OCR system via command line
-            cmd = [
-                sys.executable, "-m", "ocr_system.main_ocr",
-                str(test_file),
-                "--output", str(self.output_dir / "cli_test")
-            ]
+            # Run the CLI entry point in this process: same argument parsing and
+            # dispatch, without a new interpreter re-importing OpenCV and Tesseract
+            argv = ["main_ocr", str(test_file), "--output", str(self.output_dir / "cli_test")]
             
-            print(f"Running command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=Path.cwd())
+            print(f"Running command: python -m ocr_system.main_ocr {' '.join(argv[1:])}")
+            saved_argv = sys.argv
+            sys.argv = argv
+            try:
+                main_ocr.main()
+                success = True
+            except SystemExit as e:
+                success = e.code in (None, 0)
+            finally:
+                sys.argv = saved_argv
             
-            success = result.returncode == 0
             print(f"Command execution: {'✓' if success else '✗'}")
             
-            if not success:
-                print(f"STDOUT: {result.stdout}")
-                print(f"STDERR: {result.stderr}")
-            
             # Check if output was created
             cli_output_dir = self.output_dir / "cli_test"
             if cli_output_dir.exists():